@@ -21,7 +21,7 @@ import logging
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
-from bot.universal_database import UniversalInventoryDB, DatabaseConfig
+from bot.universal_database import UniversalInventoryDB, DatabaseConfig, DEFAULT_ODBC_DRIVER
 from bot.local_json_store import load_json_data, save_json_data
 
 logger = logging.getLogger(__name__)
@@ -80,7 +80,8 @@ class DatabaseManager:
             server=os.getenv('SQL_SERVER_HOST', ''),
             database=os.getenv('SQL_SERVER_DATABASE', ''),
             username=os.getenv('SQL_SERVER_USERNAME', ''),
-            password=os.getenv('SQL_SERVER_PASSWORD', '')
+            password=os.getenv('SQL_SERVER_PASSWORD', ''),
+            driver=os.getenv('SQL_SERVER_DRIVER', DEFAULT_ODBC_DRIVER)
         )
         
         if main_config.server and main_config.database:
@@ -114,7 +115,8 @@ class DatabaseManager:
                     server=host,
                     database=database,
                     username=username,
-                    password=password
+                    password=password,
+                    driver=os.getenv('SQL_SERVER_DRIVER', DEFAULT_ODBC_DRIVER)
                 )
                 
                 self.databases[db_name] = DatabaseInfo(
@@ -227,6 +229,9 @@ class DatabaseManager:
                 return False
 
         if db_name in self.databases:
+            if self.user_selected_db.get(user_id) == db_name:
+                # Выбор не изменился — перезапись хранилища не нужна
+                return True
             self.user_selected_db[user_id] = db_name
             # Сохраняем выбор пользователя на диск
             self._save_user_selections()
@@ -262,6 +267,9 @@ class DatabaseManager:
         """
         Создает подключение к активной базе данных пользователя
         
+        Вызывающий код проверяет результат на None и работает с объектом
+        в блоке with, чтобы соединение закрывалось и при исключениях.
+        
         Параметры:
             user_id (int): ID пользователя Telegram
             
@@ -406,10 +414,16 @@ class DatabaseManager:
             logger.warning(f"Не удалось загрузить выбор баз пользователей: {e}")
     
     def _save_user_selections(self):
-        """Сохраняет текущие выборы БД пользователей в файл."""
+        """
+        Сохраняет текущие выборы БД пользователей в локальное хранилище.
+
+        Замена записей выполняется одной транзакцией SQLite, поэтому сбой
+        посреди записи не оставляет частично сохранённых данных.
+        """
         try:
             to_save = {str(k): v for k, v in self.user_selected_db.items()}
-            save_json_data(self.user_selection_name, to_save)
+            if not save_json_data(self.user_selection_name, to_save):
+                logger.warning("Не удалось сохранить выбор баз пользователей: запись в хранилище отклонена")
         except Exception as e:
             logger.warning(f"Не удалось сохранить выбор баз пользователей: {e}")
 
@@ -8,22 +8,70 @@
 
 import csv
 import os
+import re
 import html
+import ipaddress
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Any
 import logging
 
 from bot.services.validation import validate_serial_number
-from bot.local_json_store import load_json_data, save_json_data
+from bot.local_json_store import (
+    load_json_data,
+    save_json_data,
+    append_json_data,
+    iter_json_data,
+    json_serial_exists,
+)
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Шаблоны компилируются один раз при импорте модуля
+_SERIAL_PREFIX_RE = re.compile(
+    r'^\s*(?:serial\s*number|serial\s*no\.?|serial\s*#|s/?n|sn|service\s*tag|серийный\s*номер|серийный)\s*[:#\-]?\s*',
+    re.IGNORECASE
+)
+# Все префиксы начинаются с s/S (serial, s/n, sn, service tag) или с/С (серийный)
+_SERIAL_PREFIX_FIRST_CHARS = frozenset('sSсС')
+# Совпадение по подстроке, как и прежняя проверка через name.upper()
+_SQL_KEYWORDS_RE = re.compile(r'SELECT|INSERT|UPDATE|DELETE|DROP|UNION|EXEC', re.IGNORECASE)
+_NAME_DANGEROUS_CHARS = frozenset('<>"\'&;|`$')
+_INV_DANGEROUS_CHARS = frozenset('<>"\'&;|`\n\r')
+
+
+def _strip_or_empty(value: Optional[str]) -> str:
+    """Обрезает пробелы у необязательного поля; пустое значение даёт ''."""
+    return value.strip() if value else ''
+
+
+@lru_cache(maxsize=1)
+def _get_xlwt():
+    """Ленивая загрузка xlwt; None, если библиотека не установлена."""
+    try:
+        import xlwt
+    except ImportError:
+        return None
+    return xlwt
+
+
+@lru_cache(maxsize=1)
+def _get_pandas():
+    """Ленивая загрузка pandas; None, если библиотека не установлена."""
+    try:
+        import pandas
+    except ImportError:
+        return None
+    return pandas
+
+
 class EquipmentDataManager:
     """
     Класс для управления данными о ненайденном оборудовании и перемещениях.
     """
+
+    # Наборы имён в хранилище, уже инициализированные в этом процессе
+    _initialized_names: set = set()
     
     def __init__(
         self,
@@ -37,27 +85,54 @@ class EquipmentDataManager:
         self.unfound_name = os.path.basename(self.unfound_file)
         self.transfers_name = os.path.basename(self.transfers_file)
         self.export_state_name = os.path.basename(self.export_state_file)
+        # Состояние выгрузок читается из хранилища один раз и далее живёт в памяти
+        self._export_state: Optional[Dict[str, Any]] = None
         self._ensure_files_exist()
 
     def _ensure_files_exist(self):
+        key = (self.unfound_name, self.transfers_name, self.export_state_name)
+        if key in EquipmentDataManager._initialized_names:
+            return
         load_json_data(self.unfound_name, default_content=[])
         load_json_data(self.transfers_name, default_content=[])
         load_json_data(self.export_state_name, default_content={})
+        EquipmentDataManager._initialized_names.add(key)
 
     def _load_data(self, file_path: str) -> List[Dict[str, Any]]:
         try:
             data = load_json_data(os.path.basename(file_path), default_content=[])
             return data if isinstance(data, list) else []
         except Exception as e:
-            logger.error(f"Error loading data from {file_path}: {e}")
+            logger.error("Error loading data from %s: %s", file_path, e)
             return []
 
+    def _iter_data(
+        self,
+        file_path: str,
+        db_name: Optional[str] = None,
+        since_ts: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        try:
+            for record in iter_json_data(os.path.basename(file_path), db_name=db_name, since_ts=since_ts):
+                if isinstance(record, dict):
+                    yield record
+        except Exception as e:
+            logger.error("Error loading data from %s: %s", file_path, e)
+
+    def _append_record(self, file_path: str, record: Dict[str, Any]) -> bool:
+        """Добавляет одну запись в хранилище без перезаписи всего списка."""
+        if append_json_data(os.path.basename(file_path), record):
+            logger.info("Record appended to %s", file_path)
+            return True
+        logger.error("Error appending record to %s", file_path)
+        return False
+
     def _save_data(self, file_path: str, data: List[Dict[str, Any]]):
         try:
             save_json_data(os.path.basename(file_path), data)
-            logger.info(f"Data saved to {file_path}")
+            logger.info("Data saved to %s", file_path)
         except Exception as e:
-            logger.error(f"Error saving data to {file_path}: {e}")
+            logger.error("Error saving data to %s: %s", file_path, e)
             raise
 
     def validate_employee_name(self, name: str) -> bool:
@@ -81,14 +156,11 @@ class EquipmentDataManager:
             return False
         
         # Проверяем на опасные символы
-        dangerous_chars = ['<', '>', '"', "'", '&', ';', '|', '`', '$']
-        if any(char in name for char in dangerous_chars):
+        if not _NAME_DANGEROUS_CHARS.isdisjoint(name):
             return False
         
         # Проверяем на SQL ключевые слова
-        sql_keywords = ['SELECT', 'INSERT', 'UPDATE', 'DELETE', 'DROP', 'UNION', 'EXEC']
-        name_upper = name.upper()
-        if any(keyword in name_upper for keyword in sql_keywords):
+        if _SQL_KEYWORDS_RE.search(name):
             return False
         
         return True
@@ -108,18 +180,16 @@ class EquipmentDataManager:
         
         ip = ip.strip()
         
-        # Проверяем формат IPv4
-        import re
-        ipv4_pattern = r'^((25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$'
-        if re.match(ipv4_pattern, ip):
-            return True
-        
-        # Проверяем формат IPv6 (упрощенная проверка)
-        ipv6_pattern = r'^([0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}$'
-        if re.match(ipv6_pattern, ip):
-            return True
+        # Без точки или двоеточия строка не может быть ни IPv4, ни IPv6
+        if '.' not in ip and ':' not in ip:
+            return False
         
-        return False
+        # Разбор IPv4/IPv6 (включая сокращенную запись через ::)
+        try:
+            ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+        return True
     
     def validate_inventory_number(self, inv_num: str) -> bool:
         """
@@ -132,8 +202,7 @@ class EquipmentDataManager:
             return False
         # Убрана проверка на символы - разрешаем кириллицу и любые символы
         # Проверяем только на опасные символы
-        dangerous_chars = ['<', '>', '"', "'", '&', ';', '|', '`', '\n', '\r']
-        if any(char in inv_num for char in dangerous_chars):
+        if not _INV_DANGEROUS_CHARS.isdisjoint(inv_num):
             return False
         return True
     
@@ -142,15 +211,13 @@ class EquipmentDataManager:
         Приводит сырой ввод к «чистому» серийному номеру:
         удаляет типовые префиксы (Serial Number, S/N, SN, Service Tag, Серийный номер и т.п.).
         """
-        import re
         if not serial_input or not isinstance(serial_input, str):
             return ''
         s = serial_input.strip()
-        prefix_re = re.compile(
-            r'^\s*(?:serial\s*number|serial\s*no\.?|serial\s*#|s/?n|sn|service\s*tag|серийный\s*номер|серийный)\s*[:#\-]?\s*',
-            re.IGNORECASE
-        )
-        s = prefix_re.sub('', s)
+        if not s or s[0] not in _SERIAL_PREFIX_FIRST_CHARS:
+            # Чистый серийный номер без префикса — регулярное выражение не нужно
+            return s
+        s = _SERIAL_PREFIX_RE.sub('', s)
         return s.strip()
     
     def exists_unfound_serial(self, serial_number: str) -> bool:
@@ -161,11 +228,8 @@ class EquipmentDataManager:
         cleaned = self.extract_serial_value(serial_number)
         if not cleaned:
             return False
-        data = self._load_data(self.unfound_file)
-        for record in data:
-            if record.get('serial_number') == cleaned:
-                return True
-        return False
+        # Индексированный поиск в хранилище вместо загрузки всего списка
+        return json_serial_exists(self.unfound_name, cleaned)
     
     def add_unfound_equipment(self, 
                              serial_number: str, 
@@ -205,11 +269,11 @@ class EquipmentDataManager:
         # Валидация входных данных
         cleaned_serial = self.extract_serial_value(serial_number)
         if not validate_serial_number(cleaned_serial):
-            logger.error(f"Невалидный серийный номер: {serial_number}")
+            logger.error("Невалидный серийный номер: %s", serial_number)
             return False
         
         if not self.validate_employee_name(employee_name):
-            logger.error(f"Невалидное ФИО сотрудника: {employee_name}")
+            logger.error("Невалидное ФИО сотрудника: %s", employee_name)
             return False
         
         if not model_name or len(model_name.strip()) == 0:
@@ -218,49 +282,43 @@ class EquipmentDataManager:
         
         # Валидация IP адреса если указан
         if ip_address and not self.validate_ip_address(ip_address):
-            logger.error(f"Невалидный IP адрес: {ip_address}")
+            logger.error("Невалидный IP адрес: %s", ip_address)
             return False
         
         # Валидация инвентарного номера если указан
         if inventory_number and not self.validate_inventory_number(inventory_number):
-            logger.error(f"Невалидный инвентарный номер: {inventory_number}")
+            logger.error("Невалидный инвентарный номер: %s", inventory_number)
             return False
         
-        # Загружаем существующие данные
-        data = self._load_data(self.unfound_file)
-        
         # Проверяем, не существует ли уже такая запись
-        for record in data:
-            if record.get('serial_number') == cleaned_serial:
-                logger.warning(f"Запись с серийным номером {cleaned_serial} уже существует")
-                return False
+        if json_serial_exists(self.unfound_name, cleaned_serial):
+            logger.warning("Запись с серийным номером %s уже существует", cleaned_serial)
+            return False
         
         # Создаем новую запись (без brand_name)
         new_record = {
             'serial_number': cleaned_serial.strip(),
             'model_name': model_name.strip(),
             'employee_name': employee_name.strip(),
-            'location': location.strip() if location else '',
-            'equipment_type': equipment_type.strip() if equipment_type else '',
-            'description': description.strip() if description else '',
-            'inventory_number': inventory_number.strip() if inventory_number else '',
-            'batch_number': batch_number.strip() if batch_number else '',
-            'ip_address': ip_address.strip() if ip_address else '',
-            'status': status.strip() if status else '',
-            'branch': branch.strip() if branch else '',
+            'location': _strip_or_empty(location),
+            'equipment_type': _strip_or_empty(equipment_type),
+            'description': _strip_or_empty(description),
+            'inventory_number': _strip_or_empty(inventory_number),
+            'batch_number': _strip_or_empty(batch_number),
+            'ip_address': _strip_or_empty(ip_address),
+            'status': _strip_or_empty(status),
+            'branch': _strip_or_empty(branch),
             'company': (company.strip() if company else 'ООО "Запсибгазпром-Газификация"'),
             'timestamp': datetime.now().isoformat(),
             'additional_data': additional_data or {},
             'db_name': (additional_data or {}).get('db_name', '')
         }
         
-        # Добавляем запись
-        data.append(new_record)
-        
-        # Сохраняем данные
-        self._save_data(self.unfound_file, data)
+        # Добавляем запись одной вставкой, без перезаписи всего списка
+        if not self._append_record(self.unfound_file, new_record):
+            return False
         
-        logger.info(f"Добавлена запись о ненайденном оборудовании: {serial_number}")
+        logger.info("Добавлена запись о ненайденном оборудовании: %s", serial_number)
         return True
     
     def add_equipment_transfer(self, 
@@ -285,20 +343,17 @@ class EquipmentDataManager:
         # Валидация входных данных
         cleaned_serial = self.extract_serial_value(serial_number)
         if not validate_serial_number(cleaned_serial):
-            logger.error(f"Невалидный серийный номер: {serial_number}")
+            logger.error("Невалидный серийный номер: %s", serial_number)
             return False
         
         if not self.validate_employee_name(new_employee):
-            logger.error(f"Невалидное ФИО нового сотрудника: {new_employee}")
+            logger.error("Невалидное ФИО нового сотрудника: %s", new_employee)
             return False
         
         if old_employee and not self.validate_employee_name(old_employee):
-            logger.error(f"Невалидное ФИО предыдущего сотрудника: {old_employee}")
+            logger.error("Невалидное ФИО предыдущего сотрудника: %s", old_employee)
             return False
         
-        # Загружаем существующие данные
-        data = self._load_data(self.transfers_file)
-        
         # Создаем новую запись
         new_record = {
             'serial_number': cleaned_serial.strip(),
@@ -310,14 +365,15 @@ class EquipmentDataManager:
             'act_pdf_path': act_pdf_path if act_pdf_path else None
         }
         
-        # Добавляем запись
-        data.append(new_record)
-        
-        # Сохраняем данные
-        self._save_data(self.transfers_file, data)
+        # Добавляем запись одной вставкой, без перезаписи всего списка
+        if not self._append_record(self.transfers_file, new_record):
+            return False
         
-        logger.info(f"Добавлена запись о перемещении оборудования: {serial_number} -> {new_employee}" + 
-                   (f" (акт: {act_pdf_path})" if act_pdf_path else ""))
+        if act_pdf_path:
+            logger.info("Добавлена запись о перемещении оборудования: %s -> %s (акт: %s)",
+                        serial_number, new_employee, act_pdf_path)
+        else:
+            logger.info("Добавлена запись о перемещении оборудования: %s -> %s", serial_number, new_employee)
         return True
     
     def get_unfound_equipment(self) -> List[Dict[str, Any]]:
@@ -327,7 +383,53 @@ class EquipmentDataManager:
     def get_equipment_transfers(self) -> List[Dict[str, Any]]:
         """Возвращает список перемещений оборудования."""
         return self._load_data(self.transfers_file)
+
+    def iter_unfound_equipment(self, db_name: Optional[str] = None, since_ts: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Потоково перебирает записи ненайденного оборудования без загрузки всего списка."""
+        return self._iter_data(self.unfound_file, db_name=db_name, since_ts=since_ts)
+
+    def iter_equipment_transfers(self, db_name: Optional[str] = None, since_ts: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Потоково перебирает записи о перемещениях без загрузки всего списка."""
+        return self._iter_data(self.transfers_file, db_name=db_name, since_ts=since_ts)
+
+    @staticmethod
+    def _export_since_ts(date_filter: Optional[str], last_ts: Optional[str]) -> Optional[str]:
+        """Нижняя граница отметки времени для предварительной выборки в хранилище."""
+        bounds = [value for value in (date_filter, last_ts) if value]
+        return max(bounds) if bounds else None
     
+    @staticmethod
+    def _filter_export_records(
+        records: Iterator[Dict[str, Any]],
+        date_filter: Optional[str],
+        db_filter: Optional[str],
+        last_ts: Optional[str],
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Фильтрует записи для экспорта за один проход.
+
+        Args:
+            records: Поток записей
+            date_filter: Префикс даты YYYY-MM-DD
+            db_filter: Имя базы
+            last_ts: ISO-метка последней выгрузки; метки времени пишутся
+                datetime.now().isoformat() в одном формате, поэтому их строковый
+                порядок совпадает с хронологическим
+        """
+        if not (date_filter or db_filter or last_ts):
+            # Фильтры не заданы — записи передаются без проверок
+            yield from records
+            return
+        for record in records:
+            ts = record.get('timestamp') or ''
+            if date_filter and not ts.startswith(date_filter):
+                continue
+            if db_filter and record.get('db_name') != db_filter:
+                continue
+            if last_ts and ts <= last_ts:
+                continue
+            yield record
+
     def export_to_csv(self, output_dir: str = "exports", date_filter: str = None, db_filter: Optional[str] = None, only_new: bool = False) -> Dict[str, str]:
         """
         Экспортирует данные в CSV файлы.
@@ -348,27 +450,13 @@ class EquipmentDataManager:
         current_date = datetime.now().strftime("%Y-%m-%d")
         files_created = {}
         
-        # Экспорт ненайденного оборудования
-        unfound_data = self.get_unfound_equipment()
-        # Фильтр по дате
-        if date_filter and unfound_data:
-            unfound_data = [r for r in unfound_data 
-                            if r.get('timestamp', '').startswith(date_filter)]
-        # Фильтр по базе
-        if db_filter:
-            unfound_data = [r for r in unfound_data 
-                            if r.get('db_name') == db_filter]
-        # Экспорт только новых записей, если указано
-        if only_new:
-            last_ts = self._get_last_export_ts('unfound', db_filter)
-            if last_ts:
-                try:
-                    from datetime import datetime as dt
-                    last_dt = dt.fromisoformat(last_ts)
-                    unfound_data = [r for r in unfound_data if r.get('timestamp') and dt.fromisoformat(r['timestamp']) > last_dt]
-                except Exception:
-                    # В случае ошибки парсинга даты не фильтруем
-                    pass
+        # Экспорт ненайденного оборудования: записи читаются потоково
+        # Экспорт только новых записей (с момента последней выгрузки), если указано
+        last_ts = self._get_last_export_ts('unfound', db_filter) if only_new else None
+        # Все фильтры применяются за один проход; в память попадают только подходящие записи
+        # Выборка по базе и нижней границе времени выполняется в хранилище по индексу
+        records = self.iter_unfound_equipment(db_name=db_filter, since_ts=self._export_since_ts(date_filter, last_ts))
+        unfound_data = list(self._filter_export_records(records, date_filter, db_filter, last_ts))
         
         if unfound_data:
             suffix = f"_{db_filter}" if db_filter else ""
@@ -377,26 +465,34 @@ class EquipmentDataManager:
 
             # Создаем заголовки и данные для Excel (без brand_name)
             headers = ['Компания', 'Тип', 'Модель', 'Описание', 'Серийный Номер', 'Инвентарный Номер', 'Сотрудник', 'IP Адрес', 'Статус', 'Местоположение', 'Филиал']
-            rows = []
-            for record in unfound_data:
-                row_values = [
-                    record.get('company', ''),
-                    record.get('equipment_type', ''),
-                    record.get('model_name', ''),
-                    record.get('description', ''),
-                    record.get('serial_number', ''),
-                    record.get('inventory_number', ''),
-                    record.get('employee_name', ''),
-                    record.get('ip_address', ''),
-                    record.get('status', ''),
-                    record.get('location', ''),
-                    record.get('branch', ''),
-                ]
-                rows.append(row_values)
+
+            # Максимальная отметка времени считается по ходу записи строк
+            latest_ts = ''
+
+            def _rows_iter():
+                nonlocal latest_ts
+                # Строки формируются по мере записи, без промежуточного списка
+                for record in unfound_data:
+                    ts = record.get('timestamp') or ''
+                    if ts > latest_ts:
+                        latest_ts = ts
+                    yield [
+                        record.get('company', ''),
+                        record.get('equipment_type', ''),
+                        record.get('model_name', ''),
+                        record.get('description', ''),
+                        record.get('serial_number', ''),
+                        record.get('inventory_number', ''),
+                        record.get('employee_name', ''),
+                        record.get('ip_address', ''),
+                        record.get('status', ''),
+                        record.get('location', ''),
+                        record.get('branch', ''),
+                    ]
 
             # Используем xlwt напрямую для создания файла формата Excel (.xls)
-            try:
-                import xlwt
+            xlwt = _get_xlwt()
+            if xlwt is not None:
                 # Создаем книгу и лист
                 workbook = xlwt.Workbook(encoding='utf-8')
                 worksheet = workbook.add_sheet('Ненайденное оборудование')
@@ -406,57 +502,44 @@ class EquipmentDataManager:
                     worksheet.write(0, col, header)
                 
                 # Записываем данные
-                for row, row_data in enumerate(rows, start=1):
+                for row, row_data in enumerate(_rows_iter(), start=1):
                     for col, cell_data in enumerate(row_data):
                         worksheet.write(row, col, cell_data)
                 
                 # Сохраняем файл
                 workbook.save(unfound_xls)
                 
-                # Фиксируем последнюю выгрузку
-                try:
-                    latest_ts = max((r.get('timestamp') or '') for r in unfound_data)
-                    if latest_ts:
-                        self._set_last_export_ts('unfound', db_filter, latest_ts)
-                except Exception:
-                    pass
                 files_created['unfound'] = unfound_xls
-            except ImportError:
+            else:
                 # Если xlwt не доступен, используем pandas с openpyxl для создания .xlsx файла
-                try:
-                    import pandas as pd
-                    df = pd.DataFrame(rows, columns=headers)
-                    # Создаем файл с расширением .xlsx
-                    unfound_xlsx = os.path.join(output_dir, f"export_{current_date}_unfound{suffix}.xlsx")
-                    df.to_excel(unfound_xlsx, index=False, engine='openpyxl')
-                    
-                    # Фиксируем последнюю выгрузку
+                pd = _get_pandas()
+                if pd is not None:
                     try:
-                        latest_ts = max((r.get('timestamp') or '') for r in unfound_data)
-                        if latest_ts:
-                            self._set_last_export_ts('unfound', db_filter, latest_ts)
-                    except Exception:
+                        df = pd.DataFrame(list(_rows_iter()), columns=headers)
+                        # Создаем файл с расширением .xlsx
+                        unfound_xlsx = os.path.join(output_dir, f"export_{current_date}_unfound{suffix}.xlsx")
+                        df.to_excel(unfound_xlsx, index=False, engine='openpyxl')
+                        
+                        files_created['unfound'] = unfound_xlsx
+                    except ImportError:
+                        # openpyxl не установлен — переходим к CSV
                         pass
-                    files_created['unfound'] = unfound_xlsx
-                except ImportError:
+                if 'unfound' not in files_created:
                     # Если pandas не доступен, создаем CSV файл как запасной вариант
                     unfound_csv = os.path.join(output_dir, f"export_{current_date}_unfound{suffix}.csv")
-                    import csv
-                    with open(unfound_csv, 'w', newline='', encoding='utf-8-sig') as f:
+                    # Крупный буфер записи сокращает число системных вызовов на больших выгрузках
+                    with open(unfound_csv, 'w', newline='', encoding='utf-8-sig', buffering=1 << 20) as f:
                         writer = csv.writer(f, delimiter=';')
                         writer.writerow(headers)
-                        writer.writerows(rows)
+                        writer.writerows(_rows_iter())
                     
-                    # Фиксируем последнюю выгрузку
-                    try:
-                        latest_ts = max((r.get('timestamp') or '') for r in unfound_data)
-                        if latest_ts:
-                            self._set_last_export_ts('unfound', db_filter, latest_ts)
-                    except Exception:
-                        pass
                     files_created['unfound'] = unfound_csv
+
+            # Фиксируем последнюю выгрузку
+            if 'unfound' in files_created and latest_ts:
+                self._set_last_export_ts('unfound', db_filter, latest_ts)
         
-        logger.info(f"Экспорт завершен. Созданы файлы: {files_created}")
+        logger.info("Экспорт завершен. Созданы файлы: %s", files_created)
         return files_created
 
 
@@ -477,26 +560,13 @@ class EquipmentDataManager:
         # Создаем директорию, если она не существует
         os.makedirs(output_dir, exist_ok=True)
         
-        # Загружаем данные о перемещениях
-        transfers_data = self.get_equipment_transfers()
-        
-        # Фильтруем данные по дате, если указан фильтр
-        if date_filter and transfers_data:
-            transfers_data = [r for r in transfers_data if r.get('timestamp', '').startswith(date_filter)]
-        # Фильтр по базе
-        if db_filter:
-            transfers_data = [r for r in transfers_data if r.get('db_name') == db_filter]
-        # Экспорт только новых записей, если указано
-        if only_new:
-            last_ts = self._get_last_export_ts('transfers', db_filter)
-            if last_ts:
-                try:
-                    from datetime import datetime as dt
-                    last_dt = dt.fromisoformat(last_ts)
-                    transfers_data = [r for r in transfers_data if r.get('timestamp') and dt.fromisoformat(r['timestamp']) > last_dt]
-                except Exception:
-                    # В случае ошибки парсинга даты не фильтруем
-                    pass
+        # Загружаем данные о перемещениях потоково
+        # Экспорт только новых записей (с момента последней выгрузки), если указано
+        last_ts = self._get_last_export_ts('transfers', db_filter) if only_new else None
+        # Все фильтры применяются за один проход; в память попадают только подходящие записи
+        # Выборка по базе и нижней границе времени выполняется в хранилище по индексу
+        records = self.iter_equipment_transfers(db_name=db_filter, since_ts=self._export_since_ts(date_filter, last_ts))
+        transfers_data = list(self._filter_export_records(records, date_filter, db_filter, last_ts))
         
         if not transfers_data:
             logger.warning("Нет данных о перемещениях для экспорта")
@@ -507,7 +577,8 @@ class EquipmentDataManager:
         suffix = f"_{db_filter}" if db_filter else ""
         output_file = os.path.join(output_dir, f"transfers_{current_date}{suffix}.txt")
         
-        # Создаем текстовый файл
+        # Создаем текстовый файл; максимальная отметка времени считается по ходу записи
+        latest_ts = ''
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write("Отчет о перемещении оборудования\n")
             f.write("=" * 50 + "\n\n")
@@ -515,14 +586,19 @@ class EquipmentDataManager:
                 serial_number = record.get('serial_number', 'Неизвестно')
                 new_employee = record.get('new_employee', 'Неизвестно')
                 old_employee = record.get('old_employee', 'Неизвестно')
-                timestamp = record.get('timestamp', '')
+                timestamp = record.get('timestamp') or ''
+                if timestamp and timestamp > latest_ts:
+                    latest_ts = timestamp
                 formatted_date = timestamp
-                try:
-                    dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00')) if timestamp else None
-                    if dt:
+                if len(timestamp) >= 16 and timestamp[4] == '-' and timestamp[10] in 'T ':
+                    # Отметки пишутся через isoformat(), поэтому дату достаточно разрезать по позициям
+                    formatted_date = f"{timestamp[8:10]}.{timestamp[5:7]}.{timestamp[0:4]} {timestamp[11:13]}:{timestamp[14:16]}"
+                elif timestamp:
+                    try:
+                        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
                         formatted_date = dt.strftime("%d.%m.%Y %H:%M")
-                except Exception:
-                    pass
+                    except Exception:
+                        pass
                 f.write(f"Серийный номер: {serial_number}\n")
                 f.write(f"Новый сотрудник: {new_employee}\n")
                 f.write(f"Предыдущий сотрудник: {old_employee}\n")
@@ -541,14 +617,10 @@ class EquipmentDataManager:
                 f.write("-" * 40 + "\n")
         
         # Фиксируем последнюю выгрузку
-        try:
-            latest_ts = max((r.get('timestamp') or '') for r in transfers_data)
-            if latest_ts:
-                self._set_last_export_ts('transfers', db_filter, latest_ts)
-        except Exception:
-            pass
+        if latest_ts:
+            self._set_last_export_ts('transfers', db_filter, latest_ts)
         
-        logger.info(f"Текстовый отчет о перемещениях создан: {output_file}")
+        logger.info("Текстовый отчет о перемещениях создан: %s", output_file)
         return output_file
     
     def get_statistics(self) -> Dict[str, Any]:
@@ -583,25 +655,49 @@ class EquipmentDataManager:
         try:
             save_json_data(self.export_state_name, state)
         except Exception as e:
-            logger.error(f"Error saving export checkpoint state: {e}")
+            logger.error("Error saving export checkpoint state: %s", e)
+
 
+    def _export_state_get(self) -> Dict[str, Any]:
+        """Вернуть закэшированное состояние выгрузок, загрузив его при первом обращении."""
+        if self._export_state is None:
+            self._export_state = self._load_export_state()
+        return self._export_state
 
     def _get_last_export_ts(self, data_type: str, db_name: Optional[str]) -> Optional[str]:
         """Вернуть ISO‑timestamp последней выгрузки для типа данных и базы."""
-        state = self._load_export_state()
-        bucket = state.get(data_type, {})
+        bucket = self._export_state_get().get(data_type, {})
         key = db_name or '__all__'
         return bucket.get(key)
 
     def _set_last_export_ts(self, data_type: str, db_name: Optional[str], ts: str) -> None:
         """Записать ISO‑timestamp последней выгрузки для типа данных и базы."""
-        state = self._load_export_state()
-        bucket = state.get(data_type, {})
+        state = self._export_state_get()
+        bucket = state.setdefault(data_type, {})
         key = db_name or '__all__'
+        if bucket.get(key) == ts:
+            # Отметка не изменилась — перезапись хранилища не нужна
+            return
         bucket[key] = ts
-        state[data_type] = bucket
         self._save_export_state(state)
 
+# Менеджеры для удобных функций, по одному на пару файлов данных
+_default_managers: Dict[tuple, EquipmentDataManager] = {}
+
+
+def _get_default_manager(
+    unfound_file: str = "data/unfound_equipment.json",
+    transfers_file: str = "data/equipment_transfers.json",
+) -> EquipmentDataManager:
+    """Вернуть общий менеджер для указанных файлов, создав его при первом обращении."""
+    key = (unfound_file, transfers_file)
+    manager = _default_managers.get(key)
+    if manager is None:
+        manager = EquipmentDataManager(unfound_file=unfound_file, transfers_file=transfers_file)
+        _default_managers[key] = manager
+    return manager
+
+
 # Удобные функции для использования
 def add_unfound_equipment_record(serial: str, model: str, employee: str, 
                                data_file: str = "data/unfound_equipment.json") -> bool:
@@ -617,7 +713,7 @@ def add_unfound_equipment_record(serial: str, model: str, employee: str,
     Returns:
         bool: True если запись добавлена успешно
     """
-    manager = EquipmentDataManager(unfound_file=data_file)
+    manager = _get_default_manager(unfound_file=data_file)
     return manager.add_unfound_equipment(serial, model, employee)
 
 def add_transfer_record(serial: str, new_employee: str, old_employee: str = None,
@@ -636,11 +732,14 @@ def add_transfer_record(serial: str, new_employee: str, old_employee: str = None
     Returns:
         bool: True если запись добавлена успешно
     """
-    manager = EquipmentDataManager(transfers_file=data_file)
+    manager = _get_default_manager(transfers_file=data_file)
     return manager.add_equipment_transfer(serial, new_employee, old_employee, act_pdf_path=act_pdf_path)
 
 # Пример использования
 if __name__ == "__main__":
+    # Настройка логирования только при запуске модуля как скрипта
+    logging.basicConfig(level=logging.INFO)
+
     # Создаем менеджер данных
     manager = EquipmentDataManager()
     
@@ -218,14 +218,15 @@ async def handle_act_action_callback(update: Update, context: ContextTypes.DEFAU
                 
                 # Получаем email старого владельца
                 try:
-                    logger.info(f"[ACT_EMAIL] Получение email для {old_employee} (strict=True)")
-                    owner_email = user_db.get_owner_email(old_employee, strict=True)
-                    logger.info(f"[ACT_EMAIL] Email (strict=True): {owner_email}")
-                    
-                    if not owner_email:
-                        logger.info(f"[ACT_EMAIL] Получение email для {old_employee} (strict=False)")
-                        owner_email = user_db.get_owner_email(old_employee, strict=False)
-                        logger.info(f"[ACT_EMAIL] Email (strict=False): {owner_email}")
+                    with user_db:
+                        logger.info(f"[ACT_EMAIL] Получение email для {old_employee} (strict=True)")
+                        owner_email = user_db.get_owner_email(old_employee, strict=True)
+                        logger.info(f"[ACT_EMAIL] Email (strict=True): {owner_email}")
+                        
+                        if not owner_email:
+                            logger.info(f"[ACT_EMAIL] Получение email для {old_employee} (strict=False)")
+                            owner_email = user_db.get_owner_email(old_employee, strict=False)
+                            logger.info(f"[ACT_EMAIL] Email (strict=False): {owner_email}")
                     
                     if not owner_email:
                         logger.warning(f"Email не найден для {old_employee}")
@@ -490,9 +491,10 @@ async def handle_act_action_callback(update: Update, context: ContextTypes.DEFAU
                     await return_to_main_menu(update, context)
                     return
 
-                owner_email = user_db.get_owner_email(employee_name, strict=True)
-                if not owner_email:
-                    owner_email = user_db.get_owner_email(employee_name, strict=False)
+                with user_db:
+                    owner_email = user_db.get_owner_email(employee_name, strict=True)
+                    if not owner_email:
+                        owner_email = user_db.get_owner_email(employee_name, strict=False)
 
                 if not owner_email:
                     keyboard = InlineKeyboardMarkup([
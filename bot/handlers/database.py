@@ -310,8 +310,8 @@ async def show_equipment_types_menu(update: Update, context: ContextTypes.DEFAUL
             return States.DB_SELECTION_MENU
         
         # Получаем типы оборудования
-        all_equipment_types = db.get_equipment_types()
-        db.close_connection()
+        with db:
+            all_equipment_types = db.get_equipment_types()
         
         if not all_equipment_types:
             await update.callback_query.edit_message_text(
@@ -453,8 +453,8 @@ async def show_equipment_by_type(update: Update, context: ContextTypes.DEFAULT_T
             return States.DB_VIEW_PAGINATION
         
         # Получаем список филиалов
-        branches = db.get_branches()
-        db.close_connection()
+        with db:
+            branches = db.get_branches()
         
         # Сохраняем список филиалов
         context.user_data['branches_list'] = branches
@@ -537,8 +537,8 @@ async def show_equipment_by_type_and_branch(update: Update, context: ContextType
             return States.DB_VIEW_PAGINATION
         
         # Получаем оборудование
-        equipment_list = db.get_equipment_by_type(equipment_type, branch_name=branch_name)
-        db.close_connection()
+        with db:
+            equipment_list = db.get_equipment_by_type(equipment_type, branch_name=branch_name)
         
         if not equipment_list:
             await update.callback_query.edit_message_text(
@@ -913,11 +913,6 @@ async def export_database_to_excel(db_name: str) -> str:
             logger.error(f"Конфиг базы данных {db_name} не найден")
             return None
 
-        # Создаем подключение к базе
-        db = UniversalInventoryDB(config)
-        conn = db._get_connection()
-        cursor = conn.cursor()
-
         # SQL запрос для получения всех данных (с LOCATIONS и BRANCHES)
         query_with_location = """
         SELECT
@@ -972,20 +967,25 @@ async def export_database_to_excel(db_name: str) -> str:
         ORDER BY i.SERIAL_NO
         """
 
-        # Пробуем выполнить запрос с fallback
-        try:
-            cursor.execute(query_with_location)
-            rows = cursor.fetchall()
-        except Exception as e:
-            error_msg = str(e).lower()
-            if 'branches' in error_msg or 'locations' in error_msg or 'permission' in error_msg or 'запрещено' in error_msg:
-                logger.warning(f"Нет доступа к BRANCHES/LOCATIONS, используем fallback: {e}")
-                cursor.execute(query_without_location)
-                rows = cursor.fetchall()
-            else:
-                raise e
+        # Создаем подключение к базе
+        with UniversalInventoryDB(config) as db:
+            conn = db._get_connection()
+            cursor = conn.cursor()
 
-        cursor.close()
+            # Пробуем выполнить запрос с fallback
+            try:
+                cursor.execute(query_with_location)
+                rows = cursor.fetchall()
+            except Exception as e:
+                error_msg = str(e).lower()
+                if 'branches' in error_msg or 'locations' in error_msg or 'permission' in error_msg or 'запрещено' in error_msg:
+                    logger.warning(f"Нет доступа к BRANCHES/LOCATIONS, используем fallback: {e}")
+                    cursor.execute(query_without_location)
+                    rows = cursor.fetchall()
+                else:
+                    raise e
+
+            cursor.close()
 
         if not rows:
             logger.warning(f"Нет данных для экспорта в базе {db_name}")
@@ -101,14 +101,14 @@ async def find_by_employee_input(update: Update, context: ContextTypes.DEFAULT_T
             return ConversationHandler.END
         
         # Поиск оборудования сотрудника
-        equipment_list = db.find_by_employee(employee_name)
+        with db:
+            equipment_list = db.find_by_employee(employee_name)
         
         if not equipment_list:
             await update.message.reply_text(
                 f"❌ У сотрудника <b>{employee_name}</b> не найдено оборудования.",
                 parse_mode='HTML'
             )
-            db.close_connection()
             return ConversationHandler.END
         
         # Сохраняем результаты для пагинации через PaginationHandler
@@ -119,7 +119,6 @@ async def find_by_employee_input(update: Update, context: ContextTypes.DEFAULT_T
         # Отображаем первую страницу
         await show_employee_equipment_page(update, context)
         
-        db.close_connection()
         return States.EMPLOYEE_PAGINATION
         
     except Exception as e:
@@ -346,12 +345,13 @@ async def handle_employee_export_delivery(update: Update, context: ContextTypes.
         
         if db:
             try:
-                # Сначала точное совпадение
-                employee_email = db.get_owner_email(employee_name, strict=True)
-                
-                # Если не нашли - нечеткий поиск
-                if not employee_email:
-                    employee_email = db.get_owner_email(employee_name, strict=False)
+                with db:
+                    # Сначала точное совпадение
+                    employee_email = db.get_owner_email(employee_name, strict=True)
+                    
+                    # Если не нашли - нечеткий поиск
+                    if not employee_email:
+                        employee_email = db.get_owner_email(employee_name, strict=False)
                 
                 if employee_email:
                     logger.info(f"Email сотрудника '{employee_name}': {employee_email}")
@@ -585,7 +585,8 @@ async def handle_employee_search_suggestion(update: Update, context: ContextType
                     )
                     return ConversationHandler.END
                 
-                equipment_list = db.find_by_employee(selected_name)
+                with db:
+                    equipment_list = db.find_by_employee(selected_name)
                 
                 if not equipment_list:
                     await context.bot.send_message(
@@ -593,7 +594,6 @@ async def handle_employee_search_suggestion(update: Update, context: ContextType
                         text=f"❌ У сотрудника <b>{selected_name}</b> не найдено оборудования.",
                         parse_mode='HTML'
                     )
-                    db.close_connection()
                     return ConversationHandler.END
                 
                 # Сохраняем результаты через PaginationHandler
@@ -608,7 +608,6 @@ async def handle_employee_search_suggestion(update: Update, context: ContextType
                 
                 await show_employee_equipment_page(temp_update, context)
                 
-                db.close_connection()
                 return States.EMPLOYEE_PAGINATION
                 
         except (ValueError, IndexError) as e:
@@ -635,7 +634,8 @@ async def handle_employee_search_suggestion(update: Update, context: ContextType
             )
             return ConversationHandler.END
         
-        equipment_list = db.find_by_employee(pending)
+        with db:
+            equipment_list = db.find_by_employee(pending)
         
         if not equipment_list:
             await context.bot.send_message(
@@ -643,7 +643,6 @@ async def handle_employee_search_suggestion(update: Update, context: ContextType
                 text=f"❌ У сотрудника <b>{pending}</b> не найдено оборудования.",
                 parse_mode='HTML'
             )
-            db.close_connection()
             return ConversationHandler.END
         
         # Сохраняем результаты через PaginationHandler
@@ -658,7 +657,6 @@ async def handle_employee_search_suggestion(update: Update, context: ContextType
         
         await show_employee_equipment_page(temp_update, context)
         
-        db.close_connection()
         return States.EMPLOYEE_PAGINATION
     
     # Обработка "Обновить список"
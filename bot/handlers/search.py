@@ -221,22 +221,23 @@ async def find_by_serial_input(update: Update, context: ContextTypes.DEFAULT_TYP
             await update.message.reply_text("❌ Ошибка подключения к базе данных.")
             return ConversationHandler.END
 
-        equipment = {}
-        search_hint = ""
-
-        # 1) Поиск по INV_NO из QR.
-        if search_inv_no:
-            search_hint = f"инвентарным номером <b>{search_inv_no}</b>"
-            logger.info("[SEARCH] try_inv_lookup user_id=%s inv_no=%s", user_id, search_inv_no)
-            equipment = db.find_by_inventory_number(search_inv_no)
-            logger.info("[SEARCH] inv_lookup_result user_id=%s found=%s", user_id, bool(equipment))
-
-        # 2) Если по INV_NO не нашли — пробуем по SERIAL_NO.
-        if not equipment and search_serial_no:
-            search_hint = f"серийным номером <b>{search_serial_no}</b>"
-            logger.info("[SEARCH] try_serial_lookup user_id=%s serial=%s", user_id, search_serial_no)
-            equipment = db.find_by_serial_number(search_serial_no)
-            logger.info("[SEARCH] serial_lookup_result user_id=%s found=%s", user_id, bool(equipment))
+        with db:
+            equipment = {}
+            search_hint = ""
+
+            # 1) Поиск по INV_NO из QR.
+            if search_inv_no:
+                search_hint = f"инвентарным номером <b>{search_inv_no}</b>"
+                logger.info("[SEARCH] try_inv_lookup user_id=%s inv_no=%s", user_id, search_inv_no)
+                equipment = db.find_by_inventory_number(search_inv_no)
+                logger.info("[SEARCH] inv_lookup_result user_id=%s found=%s", user_id, bool(equipment))
+
+            # 2) Если по INV_NO не нашли — пробуем по SERIAL_NO.
+            if not equipment and search_serial_no:
+                search_hint = f"серийным номером <b>{search_serial_no}</b>"
+                logger.info("[SEARCH] try_serial_lookup user_id=%s serial=%s", user_id, search_serial_no)
+                equipment = db.find_by_serial_number(search_serial_no)
+                logger.info("[SEARCH] serial_lookup_result user_id=%s found=%s", user_id, bool(equipment))
 
         if equipment:
             logger.info(
@@ -302,7 +303,6 @@ async def find_by_serial_input(update: Update, context: ContextTypes.DEFAULT_TYP
                 reply_markup=keyboard,
             )
 
-        db.close_connection()
         logger.info("[SEARCH] end user_id=%s", user_id)
 
     except Exception as e:
@@ -214,24 +214,23 @@ async def receive_transfer_photos(update: Update, context: ContextTypes.DEFAULT_
             await update.message.reply_text("⚠️ Не удалось подключиться к базе данных.")
             return States.TRANSFER_WAIT_PHOTOS
 
-        try:
-            equipment = {}
+        with db:
+            try:
+                equipment = {}
 
-            if search_inv_no:
-                logger.info("[TRANSFER] try_inv_lookup user_id=%s inv_no=%s", user_id, search_inv_no)
-                equipment = db.find_by_inventory_number(search_inv_no)
-                logger.info("[TRANSFER] inv_lookup_result user_id=%s found=%s", user_id, bool(equipment))
+                if search_inv_no:
+                    logger.info("[TRANSFER] try_inv_lookup user_id=%s inv_no=%s", user_id, search_inv_no)
+                    equipment = db.find_by_inventory_number(search_inv_no)
+                    logger.info("[TRANSFER] inv_lookup_result user_id=%s found=%s", user_id, bool(equipment))
 
-            if not equipment and search_serial_no:
-                logger.info("[TRANSFER] try_serial_lookup user_id=%s serial=%s", user_id, search_serial_no)
-                equipment = db.find_by_serial_number(search_serial_no)
-                logger.info("[TRANSFER] serial_lookup_result user_id=%s found=%s", user_id, bool(equipment))
-        except Exception as e:
-            lookup_value = search_inv_no or search_serial_no or "-"
-            logger.warning(f"Ошибка поиска оборудования {lookup_value}: {e}")
-            equipment = None
-        finally:
-            db.close_connection()
+                if not equipment and search_serial_no:
+                    logger.info("[TRANSFER] try_serial_lookup user_id=%s serial=%s", user_id, search_serial_no)
+                    equipment = db.find_by_serial_number(search_serial_no)
+                    logger.info("[TRANSFER] serial_lookup_result user_id=%s found=%s", user_id, bool(equipment))
+            except Exception as e:
+                lookup_value = search_inv_no or search_serial_no or "-"
+                logger.warning(f"Ошибка поиска оборудования {lookup_value}: {e}")
+                equipment = None
 
         if equipment:
             employee_name = equipment.get('EMPLOYEE_NAME') or 'Не указан'
@@ -376,42 +375,41 @@ async def receive_transfer_photos(update: Update, context: ContextTypes.DEFAULT_
                 )
                 return States.TRANSFER_WAIT_PHOTOS
             
-            try:
-                equipment = {}
-
-                # 1) Сначала точный поиск по инвентарному номеру из QR.
-                if search_inv_no:
-                    logger.info(
-                        "[TRANSFER] try_inv_lookup user_id=%s inv_no=%s",
-                        user_id,
-                        search_inv_no,
-                    )
-                    equipment = db.find_by_inventory_number(search_inv_no)
-                    logger.info(
-                        "[TRANSFER] inv_lookup_result user_id=%s found=%s",
-                        user_id,
-                        bool(equipment),
-                    )
+            with db:
+                try:
+                    equipment = {}
+
+                    # 1) Сначала точный поиск по инвентарному номеру из QR.
+                    if search_inv_no:
+                        logger.info(
+                            "[TRANSFER] try_inv_lookup user_id=%s inv_no=%s",
+                            user_id,
+                            search_inv_no,
+                        )
+                        equipment = db.find_by_inventory_number(search_inv_no)
+                        logger.info(
+                            "[TRANSFER] inv_lookup_result user_id=%s found=%s",
+                            user_id,
+                            bool(equipment),
+                        )
 
-                # 2) Если по INV_NO не нашли - ищем по SERIAL_NO.
-                if not equipment and search_serial_no:
-                    logger.info(
-                        "[TRANSFER] try_serial_lookup user_id=%s serial=%s",
-                        user_id,
-                        search_serial_no,
-                    )
-                    equipment = db.find_by_serial_number(search_serial_no)
-                    logger.info(
-                        "[TRANSFER] serial_lookup_result user_id=%s found=%s",
-                        user_id,
-                        bool(equipment),
-                    )
-            except Exception as e:
-                lookup_value = search_inv_no or search_serial_no or "-"
-                logger.warning(f"Ошибка поиска оборудования {lookup_value}: {e}")
-                equipment = None
-            finally:
-                db.close_connection()
+                    # 2) Если по INV_NO не нашли - ищем по SERIAL_NO.
+                    if not equipment and search_serial_no:
+                        logger.info(
+                            "[TRANSFER] try_serial_lookup user_id=%s serial=%s",
+                            user_id,
+                            search_serial_no,
+                        )
+                        equipment = db.find_by_serial_number(search_serial_no)
+                        logger.info(
+                            "[TRANSFER] serial_lookup_result user_id=%s found=%s",
+                            user_id,
+                            bool(equipment),
+                        )
+                except Exception as e:
+                    lookup_value = search_inv_no or search_serial_no or "-"
+                    logger.warning(f"Ошибка поиска оборудования {lookup_value}: {e}")
+                    equipment = None
             
             if equipment:
                 # Оборудование найдено - добавляем в список
@@ -514,15 +512,14 @@ async def receive_new_employee(update: Update, context: ContextTypes.DEFAULT_TYP
     employee_exists = False
 
     if db:
-        try:
-            owner_no = db.get_owner_no_by_name(new_employee, strict=True)
-            if not owner_no:
-                owner_no = db.get_owner_no_by_name(new_employee, strict=False)
-            employee_exists = owner_no is not None
-        except Exception as e:
-            logger.error(f"Ошибка проверки сотрудника: {e}")
-        finally:
-            db.close_connection()
+        with db:
+            try:
+                owner_no = db.get_owner_no_by_name(new_employee, strict=True)
+                if not owner_no:
+                    owner_no = db.get_owner_no_by_name(new_employee, strict=False)
+                employee_exists = owner_no is not None
+            except Exception as e:
+                logger.error(f"Ошибка проверки сотрудника: {e}")
 
     # Если сотрудника нет в базе - запрашиваем подтверждение
     if not employee_exists:
@@ -842,64 +839,63 @@ async def handle_transfer_confirmation(update: Update, context: ContextTypes.DEF
 
                             transfer_db = database_manager.create_database_connection(user_id)
                             if transfer_db:
-                                try:
-                                    # Получаем EMPL_NO нового сотрудника
-                                    new_employee_id = transfer_db.get_owner_no_by_name(new_employee, strict=True)
-                                    if not new_employee_id:
-                                        new_employee_id = transfer_db.get_owner_no_by_name(new_employee, strict=False)
-
-                                    # Если сотрудник не найден - создаём его
-                                    if not new_employee_id:
-                                        logger.info(f"Сотрудник '{new_employee}' не найден в OWNERS, создаём новую запись")
-                                        new_employee_id = transfer_db.create_owner(
-                                            employee_name=new_employee,
-                                            department=new_employee_dept
-                                        )
+                                with transfer_db:
+                                    try:
+                                        # Получаем EMPL_NO нового сотрудника
+                                        new_employee_id = transfer_db.get_owner_no_by_name(new_employee, strict=True)
+                                        if not new_employee_id:
+                                            new_employee_id = transfer_db.get_owner_no_by_name(new_employee, strict=False)
+
+                                        # Если сотрудник не найден - создаём его
+                                        if not new_employee_id:
+                                            logger.info(f"Сотрудник '{new_employee}' не найден в OWNERS, создаём новую запись")
+                                            new_employee_id = transfer_db.create_owner(
+                                                employee_name=new_employee,
+                                                department=new_employee_dept
+                                            )
+                                            if new_employee_id:
+                                                logger.info(f"✅ Создан новый владелец: {new_employee} (OWNER_NO={new_employee_id})")
+                                            else:
+                                                logger.error(f"❌ Не удалось создать владельца для '{new_employee}'")
+
+                                        logger.info(f"Используем EMPL_NO для '{new_employee}': {new_employee_id}")
+
+                                        # Получаем BRANCH_NO по названию филиала
+                                        if new_branch:
+                                            new_branch_no = transfer_db.get_branch_no_by_name(new_branch)
+                                            logger.info(f"Найден BRANCH_NO для '{new_branch}': {new_branch_no}")
+
+                                        # Получаем LOC_NO по описанию локации
+                                        if new_location:
+                                            new_loc_no = transfer_db.get_loc_no_by_descr(new_location)
+                                            logger.info(f"Найден LOC_NO для '{new_location}': {new_loc_no}")
+
+                                        # Обновляем оборудование в базе данных и добавляем запись в историю
                                         if new_employee_id:
-                                            logger.info(f"✅ Создан новый владелец: {new_employee} (OWNER_NO={new_employee_id})")
-                                        else:
-                                            logger.error(f"❌ Не удалось создать владельца для '{new_employee}'")
-
-                                    logger.info(f"Используем EMPL_NO для '{new_employee}': {new_employee_id}")
-
-                                    # Получаем BRANCH_NO по названию филиала
-                                    if new_branch:
-                                        new_branch_no = transfer_db.get_branch_no_by_name(new_branch)
-                                        logger.info(f"Найден BRANCH_NO для '{new_branch}': {new_branch_no}")
-
-                                    # Получаем LOC_NO по описанию локации
-                                    if new_location:
-                                        new_loc_no = transfer_db.get_loc_no_by_descr(new_location)
-                                        logger.info(f"Найден LOC_NO для '{new_location}': {new_loc_no}")
-
-                                    # Обновляем оборудование в базе данных и добавляем запись в историю
-                                    if new_employee_id:
-                                        for item in equipment_list:
-                                            serial = item.get('serial', '')
-                                            comment = f"Перемещение оборудования: {old_employee} -> {new_employee}"
-
-                                            try:
-                                                result = transfer_db.transfer_equipment_with_history(
-                                                    serial_number=serial,
-                                                    new_employee_id=new_employee_id,
-                                                    new_employee_name=new_employee,
-                                                    new_branch_no=new_branch_no,
-                                                    new_loc_no=new_loc_no,
-                                                    comment=comment
-                                                )
-
-                                                if result.get('success'):
-                                                    logger.info(f"✅ База обновлена: {result.get('message')}")
-                                                else:
-                                                    logger.warning(f"⚠️ Не удалось обновить БД для {serial}: {result.get('message')}")
-
-                                            except Exception as e:
-                                                logger.error(f"❌ Ошибка обновления БД для {serial}: {e}", exc_info=True)
-
-                                except Exception as e:
-                                    logger.error(f"Ошибка при обновлении базы данных: {e}", exc_info=True)
-                                finally:
-                                    transfer_db.close_connection()
+                                            for item in equipment_list:
+                                                serial = item.get('serial', '')
+                                                comment = f"Перемещение оборудования: {old_employee} -> {new_employee}"
+
+                                                try:
+                                                    result = transfer_db.transfer_equipment_with_history(
+                                                        serial_number=serial,
+                                                        new_employee_id=new_employee_id,
+                                                        new_employee_name=new_employee,
+                                                        new_branch_no=new_branch_no,
+                                                        new_loc_no=new_loc_no,
+                                                        comment=comment
+                                                    )
+
+                                                    if result.get('success'):
+                                                        logger.info(f"✅ База обновлена: {result.get('message')}")
+                                                    else:
+                                                        logger.warning(f"⚠️ Не удалось обновить БД для {serial}: {result.get('message')}")
+
+                                                except Exception as e:
+                                                    logger.error(f"❌ Ошибка обновления БД для {serial}: {e}", exc_info=True)
+
+                                    except Exception as e:
+                                        logger.error(f"Ошибка при обновлении базы данных: {e}", exc_info=True)
 
                             # Сохраняем информацию о перемещениях в JSON (для обратной совместимости)
                             for item in equipment_list:
@@ -1256,31 +1252,32 @@ async def get_employee_department(update: Update, context: ContextTypes.DEFAULT_
     
     new_employee_dept = ''
     if db:
-        try:
-            # Сначала пробуем точное совпадение
-            new_employee_dept = db.get_owner_dept(employee_name, strict=True)
-            logger.info(f"Поиск отдела (strict=True) для '{employee_name}': {new_employee_dept}")
+        with db:
+            try:
+                # Сначала пробуем точное совпадение
+                new_employee_dept = db.get_owner_dept(employee_name, strict=True)
+                logger.info(f"Поиск отдела (strict=True) для '{employee_name}': {new_employee_dept}")
             
-            # Если не нашли - пробуем нечеткий поиск
-            if not new_employee_dept:
-                new_employee_dept = db.get_owner_dept(employee_name, strict=False)
-                logger.info(f"Поиск отдела (strict=False) для '{employee_name}': {new_employee_dept}")
+                # Если не нашли - пробуем нечеткий поиск
+                if not new_employee_dept:
+                    new_employee_dept = db.get_owner_dept(employee_name, strict=False)
+                    logger.info(f"Поиск отдела (strict=False) для '{employee_name}': {new_employee_dept}")
             
-            # Если все еще не нашли - пробуем через find_by_employee
-            if not new_employee_dept:
-                logger.warning(f"Отдел не найден через get_owner_dept, пробуем find_by_employee")
-                employees = db.find_by_employee(employee_name, strict=False)
-                if employees and len(employees) > 0:
-                    # Берем отдел из первой записи оборудования
-                    new_employee_dept = employees[0].get('OWNER_DEPT', '')
-                    logger.info(f"Отдел найден через find_by_employee: {new_employee_dept}")
+                # Если все еще не нашли - пробуем через find_by_employee
+                if not new_employee_dept:
+                    logger.warning(f"Отдел не найден через get_owner_dept, пробуем find_by_employee")
+                    employees = db.find_by_employee(employee_name, strict=False)
+                    if employees and len(employees) > 0:
+                        # Берем отдел из первой записи оборудования
+                        new_employee_dept = employees[0].get('OWNER_DEPT', '')
+                        logger.info(f"Отдел найден через find_by_employee: {new_employee_dept}")
             
-            context.user_data['new_employee_dept'] = new_employee_dept if new_employee_dept else ''
-            logger.info(f"Итоговый отдел для '{employee_name}': '{new_employee_dept}'")
+                context.user_data['new_employee_dept'] = new_employee_dept if new_employee_dept else ''
+                logger.info(f"Итоговый отдел для '{employee_name}': '{new_employee_dept}'")
             
-        except Exception as e:
-            logger.error(f"Ошибка при получении отдела сотрудника '{employee_name}': {e}", exc_info=True)
-            context.user_data['new_employee_dept'] = ''
+            except Exception as e:
+                logger.error(f"Ошибка при получении отдела сотрудника '{employee_name}': {e}", exc_info=True)
+                context.user_data['new_employee_dept'] = ''
     else:
         logger.warning("Не удалось создать подключение к БД")
         context.user_data['new_employee_dept'] = ''
@@ -116,13 +116,11 @@ async def unfound_employee_input(update: Update, context: ContextTypes.DEFAULT_T
 
     employee_exists = False
     if db:
-        try:
+        with db:
             owner_no = db.get_owner_no_by_name(employee_name, strict=True)
             if not owner_no:
                 owner_no = db.get_owner_no_by_name(employee_name, strict=False)
             employee_exists = owner_no is not None
-        finally:
-            db.close_connection()
 
     if employee_exists:
         # Сотрудник найден - сохраняем и продолжаем
@@ -547,7 +545,7 @@ async def handle_unfound_confirmation(update: Update, context: ContextTypes.DEFA
             if json_success:
                 db = database_manager.create_database_connection(user_id)
                 if db:
-                    try:
+                    with db:
                         result = db.add_equipment_to_items(
                             serial_number=context.user_data.get('unfound_serial', ''),
                             model_name=context.user_data.get('unfound_model', ''),
@@ -566,9 +564,6 @@ async def handle_unfound_confirmation(update: Update, context: ContextTypes.DEFA
                         db_success = result.get('success', False)
                         db_message = result.get('message', '')
 
-                    finally:
-                        db.close_connection()
-
             # Формируем ответ пользователю
             if json_success and db_success:
                 await query.edit_message_text(
@@ -776,15 +771,13 @@ async def handle_unfound_type_suggestion(update: Update, context: ContextTypes.D
                 user_id = query.from_user.id
                 db = database_manager.create_database_connection(user_id)
                 if db:
-                    try:
+                    with db:
                         type_no = db.get_type_no_by_name(selected_type, strict=True)
                         if not type_no:
                             type_no = db.get_type_no_by_name(selected_type, strict=False)
                         if type_no:
                             context.user_data['unfound_type_no'] = type_no
                             logger.info(f"Сохранён TYPE_NO={type_no} для типа '{selected_type}'")
-                    finally:
-                        db.close_connection()
 
                 await query.edit_message_text(f"✅ Выбран тип: {selected_type}")
                 await query.message.reply_text(
@@ -848,15 +841,13 @@ async def handle_unfound_model_suggestion(update: Update, context: ContextTypes.
                 user_id = query.from_user.id
                 db = database_manager.create_database_connection(user_id)
                 if db:
-                    try:
+                    with db:
                         model_no = db.get_model_no_by_name(selected_model, strict=True)
                         if not model_no:
                             model_no = db.get_model_no_by_name(selected_model, strict=False)
                         if model_no:
                             context.user_data['unfound_model_no'] = model_no
                             logger.info(f"Сохранён MODEL_NO={model_no} для модели '{selected_model}'")
-                    finally:
-                        db.close_connection()
 
                 await query.edit_message_text(f"✅ Выбрана модель: {selected_model}")
 
@@ -998,10 +989,8 @@ async def show_status_buttons(message, context, mode='unfound', query=None):
                 await message.reply_text("📊 Введите статус оборудования:")
             return
 
-        try:
+        with db:
             statuses_with_ids = db.get_status_list_with_ids()
-        finally:
-            db.close_connection()
 
         if not statuses_with_ids:
             logger.warning("Список статусов пуст")
@@ -1454,7 +1443,7 @@ async def handle_create_new_employee(update: Update, context: ContextTypes.DEFAU
     db = database_manager.create_database_connection(user_id)
 
     if db:
-        try:
+        with db:
             # Проверяем еще раз, вдруг сотрудник уже создали
             owner_no = db.get_owner_no_by_name(employee_name, strict=True)
             if not owner_no:
@@ -1486,9 +1475,6 @@ async def handle_create_new_employee(update: Update, context: ContextTypes.DEFAU
             else:
                 await query.edit_message_text("❌ Не удалось создать сотрудника. Попробуйте позже.")
                 return States.UNFOUND_EMPLOYEE_INPUT
-
-        finally:
-            db.close_connection()
     else:
         await query.edit_message_text("❌ Ошибка подключения к базе данных")
         return States.UNFOUND_EMPLOYEE_INPUT
@@ -197,18 +197,17 @@ async def handle_serial_input_with_ocr(
     config = database_manager.get_database_config(db_name)
 
     if config:
-        db = UniversalInventoryDB(config)
-
-        result = None
-        if search_inv_no:
-            logger.info("[WORK] try_inv_lookup user_id=%s inv_no=%s", user_id, search_inv_no)
-            result = db.find_by_inventory_number(search_inv_no)
-            logger.info("[WORK] inv_lookup_result user_id=%s found=%s", user_id, bool(result))
-
-        if not result and search_serial_no:
-            logger.info("[WORK] try_serial_lookup user_id=%s serial=%s", user_id, search_serial_no)
-            result = db.find_by_serial_number(search_serial_no)
-            logger.info("[WORK] serial_lookup_result user_id=%s found=%s", user_id, bool(result))
+        with UniversalInventoryDB(config) as db:
+            result = None
+            if search_inv_no:
+                logger.info("[WORK] try_inv_lookup user_id=%s inv_no=%s", user_id, search_inv_no)
+                result = db.find_by_inventory_number(search_inv_no)
+                logger.info("[WORK] inv_lookup_result user_id=%s found=%s", user_id, bool(result))
+
+            if not result and search_serial_no:
+                logger.info("[WORK] try_serial_lookup user_id=%s serial=%s", user_id, search_serial_no)
+                result = db.find_by_serial_number(search_serial_no)
+                logger.info("[WORK] serial_lookup_result user_id=%s found=%s", user_id, bool(result))
 
         # Проверяем тип результата - может быть список или одиночная запись
         equipment = None
@@ -1704,8 +1703,6 @@ async def save_battery_replacement(context: ContextTypes.DEFAULT_TYPE) -> bool:
         if equipment_id:
             config = database_manager.get_database_config(db_name)
             if config:
-                db = UniversalInventoryDB(config)
-
                 # Проверяем, есть ли уже запись о замене батареи в описании
                 if "Последняя замена батареи:" in current_description:
                     # Обновляем последнюю запись о замене
@@ -1720,7 +1717,7 @@ async def save_battery_replacement(context: ContextTypes.DEFAULT_TYPE) -> bool:
 
                 # UPDATE в базе
                 try:
-                    with db._get_connection() as conn:
+                    with UniversalInventoryDB(config) as db, db._get_connection() as conn:
                         cursor = conn.cursor()
                         cursor.execute("""
                             UPDATE ITEMS
@@ -1784,8 +1781,6 @@ async def save_pc_cleaning(context: ContextTypes.DEFAULT_TYPE) -> bool:
         if equipment_id:
             config = database_manager.get_database_config(db_name)
             if config:
-                db = UniversalInventoryDB(config)
-
                 # Проверяем, есть ли уже запись о чистке в описании
                 if "Последняя чистка:" in current_description:
                     # Обновляем последнюю запись о чистке
@@ -1801,7 +1796,7 @@ async def save_pc_cleaning(context: ContextTypes.DEFAULT_TYPE) -> bool:
 
                 # UPDATE в базе
                 try:
-                    with db._get_connection() as conn:
+                    with UniversalInventoryDB(config) as db, db._get_connection() as conn:
                         cursor = conn.cursor()
                         cursor.execute("""
                             UPDATE ITEMS
@@ -2422,8 +2417,6 @@ async def save_component_replacement_pc(context: ContextTypes.DEFAULT_TYPE) -> b
         if equipment_id:
             config = database_manager.get_database_config(db_name)
             if config:
-                db = UniversalInventoryDB(config)
-
                 # Проверяем, есть ли уже запись о замене этого компонента в описании
                 # Используем regex для поиска существующей записи
                 pattern = rf'Замена {re.escape(component_name)}:.*?\(IT-BOT\)'
@@ -2440,7 +2433,7 @@ async def save_component_replacement_pc(context: ContextTypes.DEFAULT_TYPE) -> b
 
                 # UPDATE в базе
                 try:
-                    with db._get_connection() as conn:
+                    with UniversalInventoryDB(config) as db, db._get_connection() as conn:
                         cursor = conn.cursor()
                         cursor.execute("""
                             UPDATE ITEMS
@@ -6,7 +6,7 @@ Bot-side helper for shared local SQLite store.
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, Optional
 
 from local_store import get_local_store
 
@@ -17,6 +17,10 @@ def load_json_data(filename: str, default_content: Any = None) -> Any:
     return _store.load_json(Path(filename).name, default_content=default_content)
 
 
+def iter_json_data(filename: str, db_name: Optional[str] = None, since_ts: Optional[str] = None) -> Iterator[Any]:
+    return _store.iter_json_array(Path(filename).name, db_name=db_name, since_ts=since_ts)
+
+
 def save_json_data(filename: str, data: Any) -> bool:
     return _store.save_json(Path(filename).name, data)
 
@@ -25,6 +29,10 @@ def append_json_data(filename: str, record: Any) -> bool:
     return _store.append_to_json(Path(filename).name, record)
 
 
+def json_serial_exists(filename: str, serial_no: str) -> bool:
+    return _store.has_serial(Path(filename).name, serial_no)
+
+
 def get_store():
     return _store
 
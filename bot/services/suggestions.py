@@ -27,62 +27,63 @@ def get_employee_suggestions(query: str, user_id: int, limit: int = 8) -> List[s
     """
     logger.info(f"[SUGGESTIONS] Запрос подсказок для '{query}', user_id={user_id}, limit={limit}")
     
-    try:
-        user_db = database_manager.create_database_connection(user_id)
-        if not user_db:
-            logger.warning(f"[SUGGESTIONS] Не удалось создать подключение к БД для user_id={user_id}")
-            return []
-        
-        results = user_db.find_by_employee(query)
-        logger.info(f"[SUGGESTIONS] Найдено результатов из find_by_employee: {len(results) if results else 0}")
-    except Exception as e:
-        logger.error(f"[SUGGESTIONS] Ошибка получения подсказок сотрудников: {e}", exc_info=True)
+    user_db = database_manager.create_database_connection(user_id)
+    if not user_db:
+        logger.warning(f"[SUGGESTIONS] Не удалось создать подключение к БД для user_id={user_id}")
         return []
     
-    uniq = []
-    seen = set()
-    q = query.casefold()
-    
-    for item in results:
-        name = (item.get('EMPLOYEE_NAME') or item.get('employee_name'))
-        if not name or name == 'Не назначен':
-            continue
-        name = name.strip()
-        if name and name not in seen:
-            seen.add(name)
-            uniq.append(name)
-    
-    # Fallback: если по оборудованию ничего не нашли, пробуем OWNERS
-    if not uniq:
-        logger.info(f"[SUGGESTIONS] Fallback на таблицу OWNERS для '{query}'")
+    with user_db:
         try:
-            conn = user_db._get_connection()
-            cursor = conn.cursor()
-            param = f"%{query}%"
-            cursor.execute(
-                """
-                SELECT DISTINCT o.OWNER_DISPLAY_NAME
-                FROM OWNERS o
-                WHERE o.OWNER_DISPLAY_NAME LIKE ?
-                ORDER BY o.OWNER_DISPLAY_NAME
-                """,
-                (param,)
-            )
-            for row in cursor.fetchall():
-                name = (row[0] or '').strip()
-                if not name or name.lower() in {'не назначен', 'не указан', 'неизвестно'}:
-                    continue
-                if name not in seen:
-                    seen.add(name)
-                    uniq.append(name)
-            logger.info(f"[SUGGESTIONS] Найдено из OWNERS: {len(uniq)} записей")
+            results = user_db.find_by_employee(query)
+            logger.info(f"[SUGGESTIONS] Найдено результатов из find_by_employee: {len(results) if results else 0}")
         except Exception as e:
-            logger.error(f"[SUGGESTIONS] Ошибка получения подсказок из OWNERS: {e}", exc_info=True)
-        finally:
+            logger.error(f"[SUGGESTIONS] Ошибка получения подсказок сотрудников: {e}", exc_info=True)
+            return []
+    
+        uniq = []
+        seen = set()
+        q = query.casefold()
+    
+        for item in results:
+            name = (item.get('EMPLOYEE_NAME') or item.get('employee_name'))
+            if not name or name == 'Не назначен':
+                continue
+            name = name.strip()
+            if name and name not in seen:
+                seen.add(name)
+                uniq.append(name)
+    
+        # Fallback: если по оборудованию ничего не нашли, пробуем OWNERS
+        if not uniq:
+            logger.info(f"[SUGGESTIONS] Fallback на таблицу OWNERS для '{query}'")
             try:
-                cursor.close()
-            except Exception:
-                pass
+                conn = user_db._get_connection()
+                cursor = conn.cursor()
+                param = f"%{query}%"
+                cursor.execute(
+                    """
+                    SELECT DISTINCT o.OWNER_DISPLAY_NAME
+                    FROM OWNERS o
+                    WHERE o.OWNER_DISPLAY_NAME LIKE ?
+                    ORDER BY o.OWNER_DISPLAY_NAME
+                    """,
+                    (param,)
+                )
+                for row in cursor.fetchall():
+                    name = (row[0] or '').strip()
+                    if not name or name.lower() in {'не назначен', 'не указан', 'неизвестно'}:
+                        continue
+                    if name not in seen:
+                        seen.add(name)
+                        uniq.append(name)
+                logger.info(f"[SUGGESTIONS] Найдено из OWNERS: {len(uniq)} записей")
+            except Exception as e:
+                logger.error(f"[SUGGESTIONS] Ошибка получения подсказок из OWNERS: {e}", exc_info=True)
+            finally:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
     
     # Сортировка: сначала начинающиеся с query, потом содержащие
     starts = [n for n in uniq if n.casefold().startswith(q)]
@@ -158,29 +159,30 @@ def get_model_suggestions(query: str, user_id: int, limit: int = 8, equipment_ty
             logger.warning(f"[SUGGESTIONS] Не удалось создать подключение к БД для user_id={user_id}")
             return []
 
-        # Для коротких запросов (< 3 символов) используем стандартный поиск
-        if len(query.strip()) < 3:
-            logger.info(f"[SUGGESTIONS] Короткий запрос '{query}', используем стандартный поиск")
-            results = user_db.search_equipment(query)
-        else:
-            # Для длинных запросов пробуем несколько стратегий поиска
-            all_results = []
+        with user_db:
+            # Для коротких запросов (< 3 символов) используем стандартный поиск
+            if len(query.strip()) < 3:
+                logger.info(f"[SUGGESTIONS] Короткий запрос '{query}', используем стандартный поиск")
+                results = user_db.search_equipment(query)
+            else:
+                # Для длинных запросов пробуем несколько стратегий поиска
+                all_results = []
 
-            # 1. Стандартный поиск по всему запросу
-            standard_results = user_db.search_equipment(query)
-            all_results.extend(standard_results)
-            logger.info(f"[SUGGESTIONS] Стандартный поиск нашел {len(standard_results)} результатов")
+                # 1. Стандартный поиск по всему запросу
+                standard_results = user_db.search_equipment(query)
+                all_results.extend(standard_results)
+                logger.info(f"[SUGGESTIONS] Стандартный поиск нашел {len(standard_results)} результатов")
 
-            # 2. Поиск по отдельным словам из запроса
-            query_words = [w.strip() for w in query.split() if len(w.strip()) >= 2]
-            if len(query_words) > 1:
-                logger.info(f"[SUGGESTIONS] Поиск по отдельным словам: {query_words}")
-                for word in query_words:
-                    word_results = user_db.search_equipment(word)
-                    all_results.extend(word_results)
-                    logger.info(f"[SUGGESTIONS] Поиск по слову '{word}' нашел {len(word_results)} результатов")
+                # 2. Поиск по отдельным словам из запроса
+                query_words = [w.strip() for w in query.split() if len(w.strip()) >= 2]
+                if len(query_words) > 1:
+                    logger.info(f"[SUGGESTIONS] Поиск по отдельным словам: {query_words}")
+                    for word in query_words:
+                        word_results = user_db.search_equipment(word)
+                        all_results.extend(word_results)
+                        logger.info(f"[SUGGESTIONS] Поиск по слову '{word}' нашел {len(word_results)} результатов")
 
-            results = all_results
+                results = all_results
 
     except Exception as e:
         logger.error(f"Ошибка получения подсказок моделей: {e}")
@@ -262,44 +264,45 @@ def get_location_suggestions(query: str, user_id: int, limit: int = 8, branch: s
         if not user_db:
             return []
 
-        conn = user_db._get_connection()
-        cursor = conn.cursor()
-        param = f"%{query}%"
-
-        # Получаем локации через таблицу LOCATIONS для получения читаемых названий
-        try:
-            if branch:
-                # Фильтруем по филиалу через таблицу BRANCHES
-                cursor.execute(
-                    """
-                    SELECT DISTINCT l.DESCR
-                    FROM ITEMS i
-                    JOIN BRANCHES b ON i.BRANCH_NO = b.BRANCH_NO
-                    LEFT JOIN LOCATIONS l ON i.LOC_NO = l.LOC_NO
-                    WHERE l.DESCR LIKE ? AND l.DESCR IS NOT NULL AND b.BRANCH_NAME = ?
-                    ORDER BY l.DESCR
-                    """,
-                    (param, branch)
-                )
-            else:
-                # Без фильтрации по филиалу
-                cursor.execute(
-                    """
-                    SELECT DISTINCT l.DESCR
-                    FROM LOCATIONS l
-                    WHERE l.DESCR LIKE ?
-                    ORDER BY l.DESCR
-                    """,
-                    (param,)
-                )
-            # Преобразуем в строку перед обработкой (DESCR может быть числом)
-            locations = [str(row[0]).strip() for row in cursor.fetchall() if row[0] and str(row[0]).strip()]
-
-        except Exception as e:
-            logger.error(f"Ошибка при получении локаций: {e}")
-            locations = []
+        with user_db:
+            conn = user_db._get_connection()
+            cursor = conn.cursor()
+            param = f"%{query}%"
 
-        cursor.close()
+            # Получаем локации через таблицу LOCATIONS для получения читаемых названий
+            try:
+                if branch:
+                    # Фильтруем по филиалу через таблицу BRANCHES
+                    cursor.execute(
+                        """
+                        SELECT DISTINCT l.DESCR
+                        FROM ITEMS i
+                        JOIN BRANCHES b ON i.BRANCH_NO = b.BRANCH_NO
+                        LEFT JOIN LOCATIONS l ON i.LOC_NO = l.LOC_NO
+                        WHERE l.DESCR LIKE ? AND l.DESCR IS NOT NULL AND b.BRANCH_NAME = ?
+                        ORDER BY l.DESCR
+                        """,
+                        (param, branch)
+                    )
+                else:
+                    # Без фильтрации по филиалу
+                    cursor.execute(
+                        """
+                        SELECT DISTINCT l.DESCR
+                        FROM LOCATIONS l
+                        WHERE l.DESCR LIKE ?
+                        ORDER BY l.DESCR
+                        """,
+                        (param,)
+                    )
+                # Преобразуем в строку перед обработкой (DESCR может быть числом)
+                locations = [str(row[0]).strip() for row in cursor.fetchall() if row[0] and str(row[0]).strip()]
+
+            except Exception as e:
+                logger.error(f"Ошибка при получении локаций: {e}")
+                locations = []
+
+            cursor.close()
 
         # Фильтруем и сортируем
         uniq = []
@@ -336,7 +339,8 @@ def get_branch_suggestions(user_id: int) -> List[str]:
         if not user_db:
             return []
 
-        branches = user_db.get_branches()
+        with user_db:
+            branches = user_db.get_branches()
         return [b.get('BRANCH_NAME', '') for b in branches if b.get('BRANCH_NAME')]
 
     except Exception as e:
@@ -360,26 +364,27 @@ def get_locations_by_branch(user_id: int, branch: str) -> List[str]:
         if not user_db:
             return []
 
-        conn = user_db._get_connection()
-        cursor = conn.cursor()
-
-        # Получаем локации для конкретного филиала через таблицу LOCATIONS
-        cursor.execute(
-            """
-            SELECT DISTINCT l.DESCR
-            FROM ITEMS i
-            JOIN BRANCHES b ON i.BRANCH_NO = b.BRANCH_NO
-            LEFT JOIN LOCATIONS l ON i.LOC_NO = l.LOC_NO
-            WHERE i.LOC_NO IS NOT NULL AND i.LOC_NO != '' AND b.BRANCH_NAME = ?
-                AND l.DESCR IS NOT NULL AND l.DESCR != ''
-            ORDER BY l.DESCR
-            """,
-            (branch,)
-        )
-
-        # Преобразуем в строку перед обработкой (DESCR может быть числом)
-        locations = [str(row[0]).strip() for row in cursor.fetchall() if row[0] and str(row[0]).strip()]
-        cursor.close()
+        with user_db:
+            conn = user_db._get_connection()
+            cursor = conn.cursor()
+
+            # Получаем локации для конкретного филиала через таблицу LOCATIONS
+            cursor.execute(
+                """
+                SELECT DISTINCT l.DESCR
+                FROM ITEMS i
+                JOIN BRANCHES b ON i.BRANCH_NO = b.BRANCH_NO
+                LEFT JOIN LOCATIONS l ON i.LOC_NO = l.LOC_NO
+                WHERE i.LOC_NO IS NOT NULL AND i.LOC_NO != '' AND b.BRANCH_NAME = ?
+                    AND l.DESCR IS NOT NULL AND l.DESCR != ''
+                ORDER BY l.DESCR
+                """,
+                (branch,)
+            )
+
+            # Преобразуем в строку перед обработкой (DESCR может быть числом)
+            locations = [str(row[0]).strip() for row in cursor.fetchall() if row[0] and str(row[0]).strip()]
+            cursor.close()
 
         logger.info(f"[SUGGESTIONS] Получено {len(locations)} локаций для филиала '{branch}'")
         return locations
@@ -407,7 +412,8 @@ def get_equipment_type_suggestions(user_id: int, limit: int = 15) -> List[str]:
             return []
         
         # Получаем все типы оборудования из БД
-        all_types = user_db.get_equipment_types()
+        with user_db:
+            all_types = user_db.get_equipment_types()
         
         # Возвращаем первые N типов
         return all_types[:limit] if all_types else []
@@ -436,7 +442,8 @@ def get_equipment_type_suggestions_by_query(query: str, user_id: int, limit: int
             return []
         
         # Получаем все типы оборудования из БД
-        all_types = user_db.get_equipment_types()
+        with user_db:
+            all_types = user_db.get_equipment_types()
         
         if not all_types:
             return []
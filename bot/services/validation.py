@@ -8,10 +8,15 @@
 
 import re
 import logging
+import ipaddress
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Шаблоны компилируются один раз при импорте модуля
+_SERIAL_RE = re.compile(r'^[a-zA-Z0-9_\-\. :]+$')
+_UNSAFE_CHARS_RE = re.compile(r'[<>"\';|`]')
+
 
 def validate_serial_number(serial: str) -> bool:
     """
@@ -34,7 +39,7 @@ def validate_serial_number(serial: str) -> bool:
         return False
     
     # Проверка допустимых символов (буквы, цифры, дефис, подчеркивание, точка, пробел, двоеточие)
-    if not re.match(r'^[a-zA-Z0-9_\-\. :]+$', serial):
+    if not _SERIAL_RE.match(serial):
         logger.warning(f"Серийный номер содержит недопустимые символы: {serial}")
         return False
     
@@ -92,15 +97,14 @@ def validate_ip_address(ip: str) -> bool:
     
     ip = ip.strip()
     
-    # Проверка формата IPv4
-    ipv4_pattern = r'^((25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$'
-    if re.match(ipv4_pattern, ip):
-        return True
-    
-    # Проверка формата IPv6 (упрощенная)
-    ipv6_pattern = r'^([0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}$'
-    if re.match(ipv6_pattern, ip):
-        return True
+    # Без точки или двоеточия строка не может быть ни IPv4, ни IPv6
+    if '.' in ip or ':' in ip:
+        # Разбор IPv4/IPv6 (включая сокращенную запись через ::)
+        try:
+            ipaddress.ip_address(ip)
+            return True
+        except ValueError:
+            pass
     
     logger.warning(f"IP адрес имеет некорректный формат: {ip}")
     return False
@@ -152,7 +156,7 @@ def sanitize_input(text: str, max_length: Optional[int] = None) -> str:
     
     # Удаляем опасные символы
     text = text.strip()
-    text = re.sub(r'[<>"\';|`]', '', text)
+    text = _UNSAFE_CHARS_RE.sub('', text)
     
     # Ограничиваем длину
     if max_length and len(text) > max_length:
@@ -37,7 +37,7 @@ def paginate_results(
     if not results:
         return [], 0, False, False
     
-    total_pages = (len(results) + items_per_page - 1) // items_per_page
+    total_pages = calculate_total_pages(len(results), items_per_page)
     
     # Проверяем корректность номера страницы
     if page < 0:
@@ -87,9 +87,8 @@ def calculate_total_pages(total_items: int, items_per_page: int = 5) -> int:
     Возвращает:
         int: Количество страниц
     """
-    if total_items == 0:
-        return 0
-    return (total_items + items_per_page - 1) // items_per_page
+    # Деление с округлением вверх; для 0 элементов сразу даёт 0 страниц
+    return -(-total_items // items_per_page)
 
 
 # ============================ УНИВЕРСАЛЬНЫЙ ОБРАБОТЧИК ПАГИНАЦИИ ============================
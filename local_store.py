@@ -19,11 +19,43 @@ import threading
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Callable, Dict, Iterable, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 
+def _json_dumps(payload: Any) -> str:
+    """
+    Serialize payload for payload_json columns (orjson when available).
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(payload, ensure_ascii=False)
+
+
+def _json_loads(raw: Any) -> Any:
+    """
+    Parse payload_json (orjson when available).
+
+    orjson rejects NaN/Infinity, which stdlib json accepted in legacy files
+    and already stored rows, so such payloads fall back to json.loads.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
+
+
 def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -288,7 +320,7 @@ class SQLiteLocalStore:
             text = path.read_text(encoding="utf-8")
             if not text.strip():
                 return default_content
-            return json.loads(text)
+            return _json_loads(text)
         except Exception as exc:
             logger.warning("JSON fallback read failed for %s: %s", path, exc)
             return default_content
@@ -334,8 +366,8 @@ class SQLiteLocalStore:
                 fields["employee"] or None,
                 fields["component_type"] or None,
                 fields["model_name"] or None,
-                json.dumps(normalized_payload, ensure_ascii=False),
-                json.dumps(payload, ensure_ascii=False),
+                _json_dumps(normalized_payload),
+                _json_dumps(payload),
                 now,
                 now,
             ),
@@ -359,7 +391,7 @@ class SQLiteLocalStore:
                 if rows:
                     result: Dict[str, Any] = {}
                     for row in rows:
-                        result[str(row["entry_key"])] = json.loads(row["payload_json"])
+                        result[str(row["entry_key"])] = _json_loads(row["payload_json"])
                     return result
             elif kind == "list":
                 rows = conn.execute(
@@ -372,7 +404,7 @@ class SQLiteLocalStore:
                     (normalized_name,),
                 ).fetchall()
                 if rows:
-                    return [json.loads(row["payload_json"]) for row in rows]
+                    return [_json_loads(row["payload_json"]) for row in rows]
             else:
                 row = conn.execute(
                     """
@@ -384,7 +416,7 @@ class SQLiteLocalStore:
                     (normalized_name,),
                 ).fetchone()
                 if row:
-                    return json.loads(row["payload_json"])
+                    return _json_loads(row["payload_json"])
 
         if not self.enable_json_fallback:
             return default_content
@@ -399,6 +431,57 @@ class SQLiteLocalStore:
             logger.warning("Could not hydrate SQLite from JSON fallback (%s): %s", normalized_name, exc)
         return fallback_data
 
+    def iter_json_array(
+        self,
+        file_name: str,
+        *,
+        batch_size: int = 500,
+        db_name: Optional[str] = None,
+        since_ts: Optional[str] = None,
+    ) -> Iterator[Any]:
+        """
+        Stream list payloads in insertion order without materializing the whole list.
+
+        db_name and since_ts narrow the scan on the indexed db_name/event_ts columns
+        (since_ts is an inclusive lower bound). They are a pre-filter only: the JSON
+        fallback path returns everything, so callers still check each record.
+        """
+        normalized_name = _normalize_filename(file_name)
+        if self.enable_json_fallback and not self.count_rows(normalized_name):
+            fallback_data = self.load_json(normalized_name, default_content=[])
+            yield from (fallback_data if isinstance(fallback_data, list) else [])
+            return
+
+        clauses = ["file_name = ?", "entry_key IS NULL"]
+        params: List[Any] = [normalized_name]
+        if db_name:
+            clauses.append("db_name = ?")
+            params.append(db_name)
+        if since_ts:
+            clauses.append("event_ts >= ?")
+            params.append(since_ts)
+
+        # Separate connection: WAL gives a stable snapshot without holding the store lock between batches
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                f"""
+                SELECT payload_json
+                FROM local_records
+                WHERE {" AND ".join(clauses)}
+                ORDER BY id ASC
+                """,
+                params,
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield _json_loads(row["payload_json"])
+        finally:
+            conn.close()
+
     def save_json(self, file_name: str, data: Any) -> bool:
         normalized_name = _normalize_filename(file_name)
         kind = self._infer_kind(normalized_name, data)
@@ -444,6 +527,26 @@ class SQLiteLocalStore:
             logger.error("SQLite append failed for %s: %s", normalized_name, exc)
             return False
 
+    def has_serial(self, file_name: str, serial_no: str) -> bool:
+        """
+        Indexed existence check by serial_no without decoding payloads.
+        """
+        normalized_name = _normalize_filename(file_name)
+        serial = _clean_str(serial_no)
+        if not serial:
+            return False
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT 1
+                FROM local_records
+                WHERE file_name = ? AND serial_no = ?
+                LIMIT 1
+                """,
+                (normalized_name, serial),
+            ).fetchone()
+            return row is not None
+
     def update_json_array(
         self,
         file_name: str,
@@ -520,7 +623,7 @@ class SQLiteLocalStore:
                     (normalized_name,),
                 ).fetchall()
                 existing_hashes = {
-                    _payload_hash(normalized_name, json.loads(row["payload_json"]))
+                    _payload_hash(normalized_name, _json_loads(row["payload_json"]))
                     for row in existing_rows
                 }
 
@@ -547,7 +650,7 @@ class SQLiteLocalStore:
                     (normalized_name,),
                 ).fetchall()
                 existing_map = {
-                    str(row["entry_key"]): _payload_hash(normalized_name, json.loads(row["payload_json"]))
+                    str(row["entry_key"]): _payload_hash(normalized_name, _json_loads(row["payload_json"]))
                     for row in existing_rows
                 }
 
@@ -591,7 +694,7 @@ class SQLiteLocalStore:
             ).fetchone()
             incoming_hash = _payload_hash(normalized_name, payload)
             if existing_row:
-                existing_hash = _payload_hash(normalized_name, json.loads(existing_row["payload_json"]))
+                existing_hash = _payload_hash(normalized_name, _json_loads(existing_row["payload_json"]))
                 if existing_hash == incoming_hash:
                     stats["skipped_duplicate"] += 1
                     return stats
@@ -627,7 +730,7 @@ class SQLiteLocalStore:
         try:
             raw = path.read_text(encoding="utf-8")
             checksum = hashlib.sha256(raw.encode("utf-8")).hexdigest()
-            payload = json.loads(raw) if raw.strip() else ([] if self._infer_kind(normalized_name, None) == "list" else {})
+            payload = _json_loads(raw) if raw.strip() else ([] if self._infer_kind(normalized_name, None) == "list" else {})
         except Exception as exc:
             return MigrationResult(
                 file_name=normalized_name,
@@ -678,7 +781,7 @@ class SQLiteLocalStore:
             try:
                 raw = path.read_text(encoding="utf-8")
                 checksum = hashlib.sha256(raw.encode("utf-8")).hexdigest()
-                data = json.loads(raw) if raw.strip() else ([] if self._infer_kind(file_name, None) == "list" else {})
+                data = _json_loads(raw) if raw.strip() else ([] if self._infer_kind(file_name, None) == "list" else {})
             except Exception as exc:
                 result = MigrationResult(file_name=file_name, status="error", rows=0, checksum="", note=str(exc))
                 self._write_migration_meta(result)
@@ -0,0 +1,35 @@
+-- Индексы для поиска оборудования по сотруднику (UniversalInventoryDB.find_by_employee)
+--
+-- Без них запросы по OWNERS.OWNER_DISPLAY_NAME и соединение ITEMS -> OWNERS
+-- по EMPL_NO выполняются полным сканированием таблиц. При отсутствии индексов
+-- бот пишет предупреждение в лог при первом обращении к базе.
+--
+-- Использование:
+--     sqlcmd -S <server> -d ITINVENT -i scripts/add_indexes.sql
+--
+-- Скрипт можно запускать повторно: существующие индексы не пересоздаются,
+-- кроме IX_OWNERS_DISPLAY_NAME из прежней версии скрипта (без OWNER_EMAIL).
+
+-- Покрывающий индекс для get_owner_dept/get_owner_email/get_owner_no_by_name:
+-- все читаемые поля включены в индекс, обращение к самой таблице не нужно
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_OWNERS_DISPLAY_NAME' AND object_id = OBJECT_ID('OWNERS'))
+    CREATE INDEX IX_OWNERS_DISPLAY_NAME ON OWNERS (OWNER_DISPLAY_NAME) INCLUDE (OWNER_NO, OWNER_DEPT, OWNER_EMAIL);
+GO
+
+-- Индекс, созданный прежней версией скрипта, не включает OWNER_EMAIL:
+-- пересоздаём его на месте с полным набором столбцов
+IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_OWNERS_DISPLAY_NAME' AND object_id = OBJECT_ID('OWNERS'))
+   AND NOT EXISTS (
+       SELECT 1
+       FROM sys.indexes i
+       JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+       JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+       WHERE i.name = 'IX_OWNERS_DISPLAY_NAME' AND i.object_id = OBJECT_ID('OWNERS') AND c.name = 'OWNER_EMAIL'
+   )
+    CREATE INDEX IX_OWNERS_DISPLAY_NAME ON OWNERS (OWNER_DISPLAY_NAME) INCLUDE (OWNER_NO, OWNER_DEPT, OWNER_EMAIL)
+        WITH (DROP_EXISTING = ON);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_ITEMS_EMPL_NO' AND object_id = OBJECT_ID('ITEMS'))
+    CREATE INDEX IX_ITEMS_EMPL_NO ON ITEMS (EMPL_NO) INCLUDE (CI_TYPE, TYPE_NO, MODEL_NO, STATUS_NO, LOC_NO, BRANCH_NO);
+GO
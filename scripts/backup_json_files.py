@@ -12,6 +12,8 @@
 """
 
 import os
+import heapq
+import time
 import zipfile
 import shutil
 from pathlib import Path
@@ -30,6 +32,8 @@ PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 BACKUP_DIR = PROJECT_ROOT / "backups" / "json"
 MAX_BACKUPS = 30  # Хранить максимум 30 резервных копий
+BACKUP_COMPRESSLEVEL = 1  # Быстрое сжатие: JSON и так хорошо сжимается
+STORE_THRESHOLD_BYTES = 4096  # Файлы меньше этого размера сохраняются без сжатия
 
 # JSON файлы для резервирования
 JSON_FILES = [
@@ -63,14 +67,27 @@ def create_backup() -> Path:
     # Создаём директорию для резервных копий
     BACKUP_DIR.mkdir(parents=True, exist_ok=True)
 
+    # Один проход по data/ вместо проверки exists() для каждого файла
+    present = {}
+    if DATA_DIR.exists():
+        with os.scandir(DATA_DIR) as entries:
+            present = {entry.name: entry for entry in entries if entry.is_file()}
+
     # Создаём zip-архив
-    with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+    with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=BACKUP_COMPRESSLEVEL) as zipf:
         for json_file in JSON_FILES:
-            source_path = DATA_DIR / json_file
-            if source_path.exists():
+            entry = present.get(json_file)
+            if entry is not None:
                 # Добавляем файл в архив с относительным путём
                 arcname = f"data/{json_file}"
-                zipf.write(source_path, arcname)
+                st = entry.stat()
+                info = zipfile.ZipInfo(arcname, date_time=time.localtime(st.st_mtime)[:6])
+                info.external_attr = (st.st_mode & 0xFFFF) << 16
+                # Файл читается целиком за один раз; маленькие файлы не сжимаются
+                info.compress_type = zipfile.ZIP_DEFLATED if st.st_size > STORE_THRESHOLD_BYTES else zipfile.ZIP_STORED
+                with open(entry.path, 'rb') as f:
+                    data = f.read()
+                zipf.writestr(info, data, compresslevel=BACKUP_COMPRESSLEVEL)
                 logger.info(f"Добавлен в архив: {json_file}")
             else:
                 logger.warning(f"Файл не найден: {json_file}")
@@ -79,6 +96,22 @@ def create_backup() -> Path:
     return backup_path
 
 
+def _scan_backups() -> list[tuple[os.DirEntry, os.stat_result]]:
+    """
+    Один проход по BACKUP_DIR: архивы резервных копий вместе с их stat()
+
+    Returns:
+        list: Пары (DirEntry, stat_result) в порядке обхода директории
+    """
+    backups = []
+    with os.scandir(BACKUP_DIR) as entries:
+        for entry in entries:
+            if entry.name.startswith("json_backup_") and entry.name.endswith(".zip") and entry.is_file():
+                backups.append((entry, entry.stat()))
+
+    return backups
+
+
 def cleanup_old_backups():
     """
     Удаляет старые резервные копии, оставляя только MAX_BACKUPS последних
@@ -87,16 +120,13 @@ def cleanup_old_backups():
         return
 
     # Получаем все zip-архивы резервных копий
-    backup_files = sorted(
-        BACKUP_DIR.glob("json_backup_*.zip"),
-        key=lambda x: x.stat().st_mtime,
-        reverse=True
-    )
-
-    # Удаляем старые копии
-    files_to_delete = backup_files[MAX_BACKUPS:]
-    for old_backup in files_to_delete:
-        old_backup.unlink()
+    backup_files = _scan_backups()
+
+    # Удаляем старые копии: полная сортировка не нужна, достаточно выбрать самые старые
+    delete_count = max(0, len(backup_files) - MAX_BACKUPS)
+    files_to_delete = heapq.nsmallest(delete_count, backup_files, key=lambda item: item[1].st_mtime)
+    for old_backup, _ in files_to_delete:
+        os.unlink(old_backup.path)
         logger.info(f"Удалена старая копия: {old_backup.name}")
 
     logger.info(f"Осталось резервных копий: {len(backup_files) - len(files_to_delete)}/{MAX_BACKUPS}")
@@ -112,18 +142,18 @@ def get_backup_info() -> dict:
     if not BACKUP_DIR.exists():
         return {"total": 0, "files": [], "total_size_mb": 0}
 
-    backup_files = list(BACKUP_DIR.glob("json_backup_*.zip"))
-    total_size = sum(f.stat().st_size for f in backup_files)
+    backup_files = sorted(_scan_backups(), key=lambda item: item[1].st_mtime, reverse=True)
+    total_size = sum(st.st_size for _, st in backup_files)
 
     return {
         "total": len(backup_files),
         "files": [
             {
-                "name": f.name,
-                "size_mb": f.stat().st_size / (1024 * 1024),
-                "created": datetime.fromtimestamp(f.stat().st_mtime).isoformat()
+                "name": entry.name,
+                "size_mb": st.st_size / (1024 * 1024),
+                "created": datetime.fromtimestamp(st.st_mtime).isoformat()
             }
-            for f in sorted(backup_files, key=lambda x: x.stat().st_mtime, reverse=True)
+            for entry, st in backup_files
         ],
         "total_size_mb": total_size / (1024 * 1024),
         "backup_dir": str(BACKUP_DIR)
@@ -140,28 +170,29 @@ def restore_backup(backup_path: Path):
     if not backup_path.exists():
         raise FileNotFoundError(f"Резервная копия не найдена: {backup_path}")
 
-    # Создаём временную директорию для распаковки
-    temp_dir = PROJECT_ROOT / "temp_restore"
-    temp_dir.mkdir(exist_ok=True)
-
-    try:
-        # Распаковываем архив
-        with zipfile.ZipFile(backup_path, 'r') as zipf:
-            zipf.extractall(temp_dir)
-
-        # Копируем файлы из data/ в основную директорию
-        restore_source = temp_dir / "data"
-        if restore_source.exists():
-            for json_file in restore_source.glob("*.json"):
-                dest_path = DATA_DIR / json_file.name
-                shutil.copy2(json_file, dest_path)
-                logger.info(f"Восстановлен: {json_file.name}")
-
-        logger.info(f"Восстановление завершено из: {backup_path}")
-
-    finally:
-        # Удаляем временную директорию
-        shutil.rmtree(temp_dir, ignore_errors=True)
+    # Файлы из data/ пишутся прямо из архива, без промежуточной распаковки;
+    # каждый файл заменяется атомарно через временный файл
+    with zipfile.ZipFile(backup_path, 'r') as zipf:
+        for info in zipf.infolist():
+            name = info.filename
+            if not name.startswith("data/") or not name.endswith(".json"):
+                continue
+            json_name = name[len("data/"):]
+            if "/" in json_name or json_name.startswith("."):
+                continue
+
+            dest_path = DATA_DIR / json_name
+            tmp_path = dest_path.with_suffix(".json.restoring")
+            try:
+                with zipf.open(info) as src, open(tmp_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, length=65536)
+                os.replace(tmp_path, dest_path)
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+            logger.info(f"Восстановлен: {json_name}")
+
+    logger.info(f"Восстановление завершено из: {backup_path}")
 
 
 def main():
@@ -14,9 +14,14 @@
 """
 
 import os
+import re
+import time
+import fnmatch
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
+from typing import Optional
 import logging
 
 # Настройка логирования
@@ -37,6 +42,8 @@ TEMP_PATTERNS = [
     "temp_component_replacement_*.jpg",
     "temp_transfer_*.jpg",
 ]
+# Все шаблоны проверяются одним выражением за один проход по директории
+TEMP_NAME_RE = re.compile("|".join(fnmatch.translate(pattern) for pattern in TEMP_PATTERNS))
 
 # Директории для проверки
 DIRECTORIES_TO_CHECK = [
@@ -44,6 +51,30 @@ DIRECTORIES_TO_CHECK = [
     PROJECT_ROOT / "transfer_acts",  # Акты перемещения
 ]
 
+# Максимум потоков для пакетного удаления файлов
+UNLINK_WORKERS = 8
+
+
+def _unlink_many(paths: list[Path]) -> list[Optional[Exception]]:
+    """
+    Удаляет файлы пакетом в пуле потоков
+
+    Returns:
+        list: Для каждого пути None при успехе или возникшее исключение
+    """
+    def _unlink(path: Path) -> Optional[Exception]:
+        try:
+            path.unlink()
+            return None
+        except Exception as e:
+            return e
+
+    if len(paths) <= 1:
+        return [_unlink(path) for path in paths]
+
+    with ThreadPoolExecutor(max_workers=min(UNLINK_WORKERS, len(paths))) as executor:
+        return list(executor.map(_unlink, paths))
+
 
 class TempFileCleanup:
     """Класс для очистки временных файлов"""
@@ -57,41 +88,54 @@ class TempFileCleanup:
         self.max_age_hours = max_age_hours
         self.dry_run = dry_run
         self.cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
+        self.cutoff_ts = self.cutoff_time.timestamp()
 
-    def find_temp_files(self) -> list[Path]:
-        """Находит все временные файлы"""
+    def find_temp_files(self) -> list[os.DirEntry]:
+        """Находит все временные файлы (один проход scandir на директорию)"""
         temp_files = []
 
         for directory in DIRECTORIES_TO_CHECK:
             if not directory.exists():
                 continue
 
-            for pattern in TEMP_PATTERNS:
-                for file_path in directory.glob(pattern):
-                    temp_files.append(file_path)
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        continue
+                    if TEMP_NAME_RE.match(entry.name):
+                        temp_files.append(entry)
 
         return temp_files
 
-    def should_delete_file(self, file_path: Path) -> tuple[bool, str]:
+    def should_delete_file(
+        self,
+        entry: os.DirEntry,
+        now_ts: Optional[float] = None,
+    ) -> tuple[bool, str, Optional[os.stat_result]]:
         """
         Проверяет, следует ли удалить файл
 
+        Args:
+            entry: Запись директории из find_temp_files
+            now_ts: Текущее время (time.time()), общее для всего прохода очистки
+
         Returns:
-            tuple: (should_delete, reason)
+            tuple: (should_delete, reason, stat_result)
         """
-        if not file_path.exists():
-            return False, "Файл не существует"
+        # stat() берётся один раз и переиспользуется вызывающим кодом
+        try:
+            st = entry.stat()
+        except FileNotFoundError:
+            return False, "Файл не существует", None
 
-        if file_path.is_dir():
-            return False, "Это директория"
+        # Проверяем возраст файла (сравнение «сырых» отметок времени, без datetime)
+        if now_ts is None:
+            now_ts = time.time()
+        age_hours = (now_ts - st.st_mtime) / 3600
+        if st.st_mtime < self.cutoff_ts:
+            return True, f"Файл старше {age_hours:.1f} часов", st
 
-        # Проверяем возраст файла
-        file_mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-        if file_mtime < self.cutoff_time:
-            age_hours = (datetime.now() - file_mtime).total_seconds() / 3600
-            return True, f"Файл старше {age_hours:.1f} часов"
-
-        return False, f"Файл слишком новый ({(datetime.now() - file_mtime).total_seconds() / 3600:.1f} часов)"
+        return False, f"Файл слишком новый ({age_hours:.1f} часов)", st
 
     def cleanup(self) -> dict:
         """
@@ -112,11 +156,17 @@ class TempFileCleanup:
 
         logger.info(f"Найдено временных файлов: {len(temp_files)}")
 
-        for file_path in temp_files:
-            should_delete, reason = self.should_delete_file(file_path)
+        # Файлы к удалению собираются и удаляются одним пакетом после проверки
+        pending = []
+        # Текущее время берётся один раз на весь проход
+        now_ts = time.time()
+
+        for entry in temp_files:
+            file_path = Path(entry.path)
+            should_delete, reason, st = self.should_delete_file(entry, now_ts)
 
             if should_delete:
-                file_size = file_path.stat().st_size
+                file_size = st.st_size
                 stats["total_size_mb"] += file_size / (1024 * 1024)
                 stats["deleted_files"].append({
                     "path": str(file_path),
@@ -125,13 +175,7 @@ class TempFileCleanup:
                 })
 
                 if not self.dry_run:
-                    try:
-                        file_path.unlink()
-                        stats["deleted"] += 1
-                        logger.info(f"Удален: {file_path.name} ({reason})")
-                    except Exception as e:
-                        logger.error(f"Ошибка удаления {file_path}: {e}")
-                        stats["skipped"] += 1
+                    pending.append((file_path, reason))
                 else:
                     stats["deleted"] += 1
                     logger.info(f"[DRY RUN] Будет удален: {file_path.name} ({reason})")
@@ -141,7 +185,16 @@ class TempFileCleanup:
                     "path": str(file_path),
                     "reason": reason
                 })
-                logger.debug(f"Пропущен: {file_path.name} ({reason})")
+                logger.debug("Пропущен: %s (%s)", entry.name, reason)
+
+        errors = _unlink_many([file_path for file_path, _ in pending])
+        for (file_path, reason), error in zip(pending, errors):
+            if error is None:
+                stats["deleted"] += 1
+                logger.info(f"Удален: {file_path.name} ({reason})")
+            else:
+                logger.error(f"Ошибка удаления {file_path}: {error}")
+                stats["skipped"] += 1
 
         return stats
 
@@ -161,30 +214,43 @@ def cleanup_old_transfer_acts(days: int = 30, dry_run: bool = False) -> dict:
     if not transfer_dir.exists():
         return {"deleted": 0, "skipped": 0, "total_size_mb": 0}
 
-    cutoff_time = datetime.now() - timedelta(days=days)
+    cutoff_ts = (datetime.now() - timedelta(days=days)).timestamp()
     stats = {"deleted": 0, "skipped": 0, "total_size_mb": 0, "deleted_files": []}
 
-    for file_path in transfer_dir.glob("*.pdf"):
-        file_mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
+    # Один проход scandir вместо glob("*.pdf"); stat() берётся один раз на файл
+    with os.scandir(transfer_dir) as entries:
+        pdf_entries = [
+            entry for entry in entries
+            if entry.name.endswith(".pdf") and not entry.name.startswith(".") and entry.is_file()
+        ]
 
-        if file_mtime < cutoff_time:
-            file_size = file_path.stat().st_size
+    # Акты к удалению собираются и удаляются одним пакетом после проверки
+    pending = []
+
+    for entry in pdf_entries:
+        file_path = Path(entry.path)
+        st = entry.stat()
+
+        if st.st_mtime < cutoff_ts:
+            file_size = st.st_size
             stats["total_size_mb"] += file_size / (1024 * 1024)
             stats["deleted_files"].append(str(file_path))
 
             if not dry_run:
-                try:
-                    file_path.unlink()
-                    stats["deleted"] += 1
-                    logger.info(f"Удален акт: {file_path.name}")
-                except Exception as e:
-                    logger.error(f"Ошибка удаления {file_path}: {e}")
+                pending.append(file_path)
             else:
                 stats["deleted"] += 1
                 logger.info(f"[DRY RUN] Будет удален акт: {file_path.name}")
         else:
             stats["skipped"] += 1
 
+    for file_path, error in zip(pending, _unlink_many(pending)):
+        if error is None:
+            stats["deleted"] += 1
+            logger.info(f"Удален акт: {file_path.name}")
+        else:
+            logger.error(f"Ошибка удаления {file_path}: {error}")
+
     return stats
 
 
@@ -9,17 +9,76 @@
 
 import json
 import os
+import shutil
 import sys
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
 
 # Добавляем корень проекта в Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
-def migrate_cartridge_replacements():
+def _read_json(file_path: Path):
+    """
+    Читает JSON файл (через orjson, если он установлен)
+
+    orjson не принимает NaN/Infinity, которые допускал json.load в старых
+    файлах, поэтому такие файлы читаются через json.loads.
+    """
+    if orjson is not None:
+        raw = file_path.read_bytes()
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            return json.loads(raw)
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_json(file_path: Path, data) -> None:
+    """
+    Записывает JSON с отступом в 2 пробела (через orjson, если он установлен)
+
+    Запись идёт во временный файл с последующей заменой, поэтому исходный
+    файл (и жёсткая ссылка-резервная копия на него) не изменяется на месте.
+    """
+    tmp_path = file_path.with_suffix('.json.tmp')
+    try:
+        if orjson is not None:
+            tmp_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, file_path)
+    finally:
+        # После неудачной записи недописанный временный файл не оставляем
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _create_backup(file_path: Path, backup_path: Path) -> None:
+    """Создаёт резервную копию жёсткой ссылкой, а при невозможности — копированием"""
+    try:
+        if backup_path.exists():
+            backup_path.unlink()
+        os.link(file_path, backup_path)
+    except OSError:
+        shutil.copy2(file_path, backup_path)
+
+
+def migrate_cartridge_replacements(data: Optional[list] = None):
     """
     Мигрирует данные о заменах картриджей в новый формат
+
+    Args:
+        data: Уже загруженное содержимое файла; записи обновляются на месте.
+            Если не передано, файл читается заново.
     """
     file_path = Path("data/cartridge_replacements.json")
     backup_path = Path("data/cartridge_replacements_backup.json")
@@ -32,14 +91,13 @@ def migrate_cartridge_replacements():
 
     # Создаем резервную копию
     if file_path.exists():
-        import shutil
-        shutil.copy2(file_path, backup_path)
+        _create_backup(file_path, backup_path)
         print(f"💾 Создана резервная копия: {backup_path}")
 
     try:
-        # Загружаем существующие данные
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Загружаем существующие данные, если они не переданы
+        if data is None:
+            data = _read_json(file_path)
 
         print(f"📊 Найдено записей: {len(data)}")
 
@@ -68,9 +126,13 @@ def migrate_cartridge_replacements():
         if updated_count > 0:
             print(f"ℹ️ Уже обновлено записей: {updated_count}")
 
+        # Все записи уже мигрированы — перезаписывать файл не нужно
+        if migrated_count == 0:
+            print(f"ℹ️ Изменений нет, файл не перезаписывается: {file_path}")
+            return True
+
         # Сохраняем обновленные данные
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        _write_json(file_path, data)
 
         print(f"💾 Данные сохранены в: {file_path}")
         return True
@@ -78,17 +140,21 @@ def migrate_cartridge_replacements():
     except Exception as e:
         print(f"❌ Ошибка миграции: {e}")
 
-        # Восстанавливаем из резервной копии при ошибке
-        if backup_path.exists():
+        # Восстанавливаем из резервной копии при ошибке. Если резервная копия —
+        # всё ещё жёсткая ссылка на исходный файл, он не изменялся
+        if backup_path.exists() and not os.path.samefile(backup_path, file_path):
             shutil.copy2(backup_path, file_path)
             print(f"🔄 Восстановлено из резервной копии")
 
         return False
 
 
-def validate_migration():
+def validate_migration(data: Optional[list] = None):
     """
     Проверяет результаты миграции
+
+    Args:
+        data: Уже загруженные (мигрированные) данные; если не переданы, файл читается заново
     """
     file_path = Path("data/cartridge_replacements.json")
 
@@ -97,8 +163,8 @@ def validate_migration():
         return
 
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if data is None:
+            data = _read_json(file_path)
 
         total_records = len(data)
         valid_records = 0
@@ -141,8 +207,7 @@ def main():
 
     # Показываем статистику до миграции
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = _read_json(file_path)
         print(f"📊 Текущее количество записей: {len(data)}")
 
         # Проверяем несколько примеров
@@ -157,26 +222,20 @@ def main():
 
     print("\n" + "=" * 50)
 
-    # Выполняем миграцию
-    if migrate_cartridge_replacements():
+    # Выполняем миграцию (файл уже прочитан, записи обновляются на месте)
+    if migrate_cartridge_replacements(data):
         print("\n✅ Миграция успешно завершена!")
         print("\n" + "=" * 50)
 
         # Валидация результатов
-        validate_migration()
+        validate_migration(data)
 
         # Показываем пример после миграции
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            if data:
-                sample = data[0]
-                print(f"\n📋 Пример записи после миграции:")
-                for key, value in sample.items():
-                    print(f"   {key}: {value}")
-        except Exception as e:
-            print(f"❌ Ошибка чтения файла после миграции: {e}")
+        if data:
+            sample = data[0]
+            print(f"\n📋 Пример записи после миграции:")
+            for key, value in sample.items():
+                print(f"   {key}: {value}")
 
         print(f"\n💡 Резервная копия сохранена в: data/cartridge_replacements_backup.json")
         print(f"🎯 Миграция добавлена поддержка component_type и component_color")
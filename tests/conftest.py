@@ -53,7 +53,7 @@ def mock_context():
     context.bot = AsyncMock()
     context.bot.send_message = AsyncMock()
     context.bot.edit_message_text = AsyncMock()
-    return update
+    return context
 
 
 @pytest.fixture
@@ -70,66 +70,73 @@ def mock_database():
     return mock_conn, mock_cursor
 
 
+# Образцы данных собираются один раз; фикстуры отдают копии,
+# чтобы изменения в одном тесте не влияли на другие
+_SAMPLE_EQUIPMENT = {
+    'ID': 123,
+    'SERIAL_NO': 'PF12345',
+    'HW_SERIAL_NO': '',
+    'MODEL_NAME': 'Dell OptiPlex 7090',
+    'BRANCH_NAME': 'Офис Москва',
+    'LOCATION': 'Офис 301',
+    'EMPLOYEE_NAME': 'Иванов И.И.',
+    'DESCRIPTION': 'Test description',
+    'CI_TYPE_ID': 1,
+    'CI_STATUS_ID': 1
+}
+
+_SAMPLE_UNFOUND_EQUIPMENT = {
+    'serial_no': 'UNKNOWN123',
+    'employee_name': 'Тестовый Тест',
+    'type_name': 'Компьютер',
+    'model_name': 'Unknown Model',
+    'description': 'Test',
+    'inventory_number': 'INV001',
+    'ip_address': '192.168.1.1',
+    'location': 'Office',
+    'status_name': 'В эксплуатации',
+    'branch_name': 'Москва',
+    'timestamp': '2024-01-01T12:00:00'
+}
+
+# Переменные окружения для тестов
+_TEST_ENV = {
+    "TELEGRAM_BOT_TOKEN": "test_token",
+    "OPENROUTER_API_KEY": "test_key",
+    "SQL_SERVER_HOST": "localhost",
+    "SQL_SERVER_DATABASE": "test_db",
+    "SQL_SERVER_USERNAME": "test_user",
+    "SQL_SERVER_PASSWORD": "test_pass",
+    "ALLOWED_USERS": "123456"
+}
+
+
 @pytest.fixture
 def sample_equipment():
     """Образец оборудования для тестов"""
-    return {
-        'ID': 123,
-        'SERIAL_NO': 'PF12345',
-        'HW_SERIAL_NO': '',
-        'MODEL_NAME': 'Dell OptiPlex 7090',
-        'BRANCH_NAME': 'Офис Москва',
-        'LOCATION': 'Офис 301',
-        'EMPLOYEE_NAME': 'Иванов И.И.',
-        'DESCRIPTION': 'Test description',
-        'CI_TYPE_ID': 1,
-        'CI_STATUS_ID': 1
-    }
+    return dict(_SAMPLE_EQUIPMENT)
 
 
 @pytest.fixture
 def sample_unfound_equipment():
     """Образец ненайденного оборудования"""
-    return {
-        'serial_no': 'UNKNOWN123',
-        'employee_name': 'Тестовый Тест',
-        'type_name': 'Компьютер',
-        'model_name': 'Unknown Model',
-        'description': 'Test',
-        'inventory_number': 'INV001',
-        'ip_address': '192.168.1.1',
-        'location': 'Office',
-        'status_name': 'В эксплуатации',
-        'branch_name': 'Москва',
-        'timestamp': '2024-01-01T12:00:00'
-    }
+    return dict(_SAMPLE_UNFOUND_EQUIPMENT)
 
 
 # Патчи для общих зависимостей
-@pytest.fixture(autouse=True)
-def mock_config(monkeypatch):
-    """Мок конфигурации для тестов"""
-    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "test_token")
-    monkeypatch.setenv("OPENROUTER_API_KEY", "test_key")
-    monkeypatch.setenv("SQL_SERVER_HOST", "localhost")
-    monkeypatch.setenv("SQL_SERVER_DATABASE", "test_db")
-    monkeypatch.setenv("SQL_SERVER_USERNAME", "test_user")
-    monkeypatch.setenv("SQL_SERVER_PASSWORD", "test_pass")
-    monkeypatch.setenv("ALLOWED_USERS", "123456")
+@pytest.fixture(scope="session", autouse=True)
+def mock_config():
+    """Мок конфигурации для тестов (устанавливается один раз на сессию)"""
+    with pytest.MonkeyPatch.context() as mp:
+        for key, value in _TEST_ENV.items():
+            mp.setenv(key, value)
+        yield
 
 
 @pytest.fixture
 def mock_env_vars(monkeypatch):
     """Мок переменных окружения"""
-    env_vars = {
-        "TELEGRAM_BOT_TOKEN": "test_token",
-        "OPENROUTER_API_KEY": "test_key",
-        "SQL_SERVER_HOST": "localhost",
-        "SQL_SERVER_DATABASE": "test_db",
-        "SQL_SERVER_USERNAME": "test_user",
-        "SQL_SERVER_PASSWORD": "test_pass",
-        "ALLOWED_USERS": "123456"
-    }
+    env_vars = dict(_TEST_ENV)
     for key, value in env_vars.items():
         monkeypatch.setenv(key, value)
     return env_vars